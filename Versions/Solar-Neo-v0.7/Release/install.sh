@@ -6,28 +6,42 @@ echo "Installing Solar Neo v0.7 — PROJECT: SOLAR"
 # Determine absolute script location
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 
-DEST_SHARE="$HOME/.local/share/solar-neo"
+DEST_SHARE="$HOME/.local/share/solarneo"
 DEST_BIN="$HOME/.local/bin"
+VERSION="$(cat "$SCRIPT_DIR/version.txt" 2>/dev/null || echo v0.7)"
+SLOT="$VERSION-$(date +%Y%m%d-%H%M%S)"
 
-mkdir -p "$DEST_SHARE" "$DEST_BIN"
+mkdir -p "$DEST_SHARE/slots/$SLOT" "$DEST_BIN"
 
-# Copy solarneo folder to share location
+# Copy solarneo folder into a fresh install slot
 if command -v rsync >/dev/null 2>&1; then
-    rsync -a --delete "$SCRIPT_DIR/solarneo" "$DEST_SHARE/"
+    rsync -a --delete "$SCRIPT_DIR/solarneo" "$DEST_SHARE/slots/$SLOT/"
 else
-    cp -r "$SCRIPT_DIR/solarneo" "$DEST_SHARE/"
+    cp -r "$SCRIPT_DIR/solarneo" "$DEST_SHARE/slots/$SLOT/"
 fi
+echo "$VERSION" > "$DEST_SHARE/slots/$SLOT/version.txt"
+
+# Switch slots: current -> slots/<slot>, solarneo -> current/solarneo
+if [ -L "$DEST_SHARE/current" ]; then
+    ln -sfn "$(readlink "$DEST_SHARE/current")" "$DEST_SHARE/previous"
+fi
+ln -sfn "slots/$SLOT" "$DEST_SHARE/current.tmp"
+mv -Tf "$DEST_SHARE/current.tmp" "$DEST_SHARE/current"
+if [ -d "$DEST_SHARE/solarneo" ] && [ ! -L "$DEST_SHARE/solarneo" ]; then
+    rm -rf "$DEST_SHARE/solarneo"
+fi
+ln -sfn "current/solarneo" "$DEST_SHARE/solarneo"
 
 # Create launcher scripts
 cat > "$DEST_BIN/solar" <<EOF
 #!/usr/bin/env bash
-export PYTHONPATH="\$HOME/.local/share/solar-neo:\$PYTHONPATH"
+export PYTHONPATH="\$HOME/.local/share/solarneo:\$PYTHONPATH"
 python3 -m solarneo "\$@"
 EOF
 
 cat > "$DEST_BIN/sln" <<EOF
 #!/usr/bin/env bash
-export PYTHONPATH="\$HOME/.local/share/solar-neo:\$PYTHONPATH"
+export PYTHONPATH="\$HOME/.local/share/solarneo:\$PYTHONPATH"
 python3 -m solarneo "\$@"
 EOF
 
@@ -1,9 +1,14 @@
+import os
+
 __version__ = "v0.7"
 
-# API + repo constants
-API_BASE      = "https://solar-a-pi.vercel.app/api/client_api"
+# API + repo constants (SOLAR_*_BASE point them elsewhere, e.g. bench/fake/server.py)
+API_BASE      = os.environ.get("SOLAR_API_BASE", "https://solar-a-pi.vercel.app/api/client_api")
+GITHUB_BASE   = os.environ.get("SOLAR_GITHUB_BASE", "https://github.com")
 GITHUB_OWNER  = "randompixle"
 GITHUB_REPO   = "Solar-Neo"
+PAGES_BASE    = os.environ.get("SOLAR_PAGES_BASE", "https://randompixle.github.io/Solar-Neo")
+INDEX_URL     = f"{PAGES_BASE}/Versions/Version_Index.json"   # releases + sha256
 
 # Release asset naming (client-only zip)
 def asset_name(tag: str) -> str:
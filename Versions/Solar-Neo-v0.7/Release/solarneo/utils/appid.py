@@ -0,0 +1,26 @@
+# Canonical app ids, so "OBS", "obs " and "com.obsproject.Studio" all name one
+# thing. Mirrored server-side in cgi-bin/appid.py; keep the two in sync.
+
+# Friendly names for Flatpak apps
+ALIASES = {
+    "obs":      "com.obsproject.Studio",
+    "vlc":      "org.videolan.VLC",
+    "gimp":     "org.gimp.GIMP",
+    "inkscape": "org.inkscape.Inkscape",
+    "kdenlive": "org.kde.kdenlive",
+    "discord":  "com.discordapp.Discord",
+    "spotify":  "com.spotify.Client",
+    "steam":    "com.valvesoftware.Steam",
+    "zoom":     "us.zoom.Zoom",
+    "vscode":   "com.visualstudio.code",
+}
+_IDS = {v.casefold(): v for v in ALIASES.values()}
+
+def fold(name):
+    """Trim, collapse inner whitespace and case-fold."""
+    return " ".join((name or "").split()).casefold()
+
+def canonical(name):
+    """Flatpak id for known apps (any casing of alias or id), else the folded name."""
+    key = fold(name)
+    return ALIASES.get(key) or _IDS.get(key) or key
@@ -0,0 +1,110 @@
+import os, json
+
+from .system import CACHE_DIR, capture_many
+from . import metrics
+
+# Persisted backend/tool capabilities so commands don't walk $PATH and
+# re-probe tools on every invocation. Invalidated by stat(), never by time.
+CAPS_PATH = os.path.join(CACHE_DIR, "caps.json")
+CAPS_SCHEMA = 1
+
+TOOLS = ("dnf5", "flatpak", "rpm-ostree", "bootc", "rpm", "sudo")
+VERSION_ARGS = {"dnf5": ["--version"], "flatpak": ["--version"],
+                "rpm-ostree": ["--version"], "bootc": ["--version"]}
+
+# flatpak keeps its remotes in these repo configs (system, user)
+REMOTE_CFGS = ("/var/lib/flatpak/repo/config", "~/.local/share/flatpak/repo/config")
+OSTREE_MARK = "/run/ostree-booted"
+
+_caps = None
+
+def _sig(path):
+    try:
+        st = os.stat(os.path.expanduser(path))
+        return [st.st_ino, st.st_mtime_ns]
+    except OSError:
+        return None
+
+def _path_key():
+    # adding/removing a binary bumps its directory's mtime
+    dirs = [d for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+    return {"PATH": os.environ.get("PATH", ""), "dirs": [_sig(d) for d in dirs]}
+
+def _valid(c):
+    if not c or c.get("schema") != CAPS_SCHEMA or c.get("key") != _path_key():
+        return False
+    for t in c.get("tools", {}).values():
+        if t and _sig(t["path"]) != t["sig"]:
+            return False
+    return c.get("remote_sigs") == [_sig(p) for p in REMOTE_CFGS] \
+        and c.get("ostree_sig") == _sig(OSTREE_MARK)
+
+def _first_line(out):
+    for ln in out.splitlines():
+        if ln.strip(): return ln.strip()
+    return ""
+
+def probe():
+    """Resolve tools, versions, flatpak remotes and the immutable-OS flag."""
+    import shutil
+    tools = {}
+    for t in TOOLS:
+        p = shutil.which(t)
+        tools[t] = {"path": p, "sig": _sig(p), "version": ""} if p else None
+    jobs = [(t, [tools[t]["path"]] + a) for t, a in VERSION_ARGS.items() if tools.get(t)]
+    if tools.get("flatpak"):
+        jobs.append(("flatpak-remotes", [tools["flatpak"]["path"], "remotes", "--columns=name"]))
+    remotes = []
+    for key, code, out in capture_many(jobs):
+        if key == "flatpak-remotes":
+            remotes = [ln.strip() for ln in out.splitlines() if ln.strip()] if code == 0 else []
+        elif code == 0:
+            tools[key]["version"] = _first_line(out)
+    return {
+        "schema": CAPS_SCHEMA,
+        "key": _path_key(),
+        "tools": tools,
+        "remotes": remotes,
+        "remote_sigs": [_sig(p) for p in REMOTE_CFGS],
+        "ostree_sig": _sig(OSTREE_MARK),
+        "immutable": os.path.exists(OSTREE_MARK) or bool(tools.get("rpm-ostree") or tools.get("bootc")),
+    }
+
+def caps(refresh=False):
+    global _caps
+    if _caps is not None and not refresh:
+        return _caps
+    c = None
+    if not refresh:
+        try:
+            with open(CAPS_PATH, "r", encoding="utf-8") as f:
+                c = json.load(f)
+        except Exception:
+            c = None
+    hit = _valid(c)
+    metrics.cache(hit)
+    if not hit:
+        c = probe()
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = CAPS_PATH + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f: json.dump(c, f)
+            os.replace(tmp, CAPS_PATH)
+        except OSError:
+            pass
+    _caps = c
+    return c
+
+def which(tool):
+    t = caps()["tools"].get(tool)
+    return t["path"] if t else None
+
+def version(tool):
+    t = caps()["tools"].get(tool)
+    return t["version"] if t else ""
+
+def has_remote(name):
+    return name in caps()["remotes"]
+
+def immutable():
+    return caps()["immutable"]
@@ -0,0 +1,152 @@
+"""
+Delta updates: per-release file manifests and patch bundles between releases.
+
+Publishing side (run from a checkout):
+    python -m solarneo.utils.delta manifest <Release dir> <out manifest.json>
+    python -m solarneo.utils.delta bundle <old Release dir> <new Release dir> <out delta.zip>
+
+Both print the Version_Index.json fields to add to the new release's entry:
+    "manifest": "<folder>/manifest.json",
+    "deltas": [{"from": "0.7", "path": "<folder>/delta-0.7.zip", "sha256": "..."}]
+
+Client side, update_to() calls delta_update() first and falls back to the
+full Release.zip whenever no short enough chain of bundles exists or the
+patched tree doesn't match the new manifest.
+"""
+import os, sys, json, shutil, zipfile
+from collections import deque
+
+from .system import (SLOTS_DIR, CURRENT, PAGES_BASE, http_json, _download, cached_archive,
+                     _hash_file, installed_version, _adopt_legacy, _activate, _new_slot)
+from .trace import traced
+from .version import key
+
+MAX_CHAIN = 3                     # more hops than this and the full zip is cheaper
+TREE = ("solarneo", "version.txt")
+
+def _walk(root):
+    for top in TREE:
+        p = os.path.join(root, top)
+        if os.path.isfile(p):
+            yield top
+        for d, dirs, files in os.walk(p):
+            dirs[:] = [x for x in dirs if x != "__pycache__"]
+            for f in files:
+                if f.endswith((".pyc", ".pyo")): continue
+                yield os.path.relpath(os.path.join(d, f), root).replace(os.sep, "/")
+
+def build_manifest(root, version=None):
+    files = {}
+    for rel in sorted(_walk(root)):
+        p = os.path.join(root, rel)
+        files[rel] = {"sha256": _hash_file(p).hexdigest(), "size": os.path.getsize(p)}
+    if version is None and os.path.isfile(os.path.join(root, "version.txt")):
+        version = open(os.path.join(root, "version.txt"), encoding="utf-8").read().strip()
+    return {"version": version, "files": files}
+
+def build_bundle(old_root, new_root, out_zip):
+    old, new = build_manifest(old_root), build_manifest(new_root)
+    changed = [f for f, m in new["files"].items() if old["files"].get(f) != m]
+    deleted = [f for f in old["files"] if f not in new["files"]]
+    meta = {"from": old["version"], "to": new["version"], "changed": changed, "deleted": deleted}
+    with zipfile.ZipFile(out_zip, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("delta.json", json.dumps(meta, indent=2))
+        for f in changed:
+            z.write(os.path.join(new_root, f), "files/" + f)
+    return meta
+
+# ---------- client ----------
+def _chain(index, cur, target):
+    """Shortest list of delta records leading from cur to target, or None."""
+    edges = {}
+    for e in (index or {}).get("versions", []):
+        for d in e.get("deltas") or []:
+            edges.setdefault(key(d.get("from")), []).append((key(e.get("version")), d))
+    start, goal = key(cur), key(target)
+    if start is None or goal is None: return None
+    todo, seen = deque([(start, [])]), {start}
+    while todo:
+        v, path = todo.popleft()
+        if v == goal: return path
+        if len(path) >= MAX_CHAIN: continue
+        for nxt, d in edges.get(v, []):
+            if nxt not in seen:
+                seen.add(nxt); todo.append((nxt, path + [d]))
+    return None
+
+def _clone_tree(src, dest):
+    # hardlink the unchanged files: costs inodes, not bytes
+    for rel in _walk(src):
+        s, d = os.path.join(src, rel), os.path.join(dest, rel)
+        os.makedirs(os.path.dirname(d), exist_ok=True)
+        try: os.link(s, d)
+        except OSError: shutil.copy2(s, d)
+
+def _apply_bundle(zpath, dest):
+    with zipfile.ZipFile(zpath) as z:
+        meta = json.loads(z.read("delta.json").decode("utf-8"))
+        for rel in meta.get("deleted", []):
+            p = os.path.join(dest, rel)
+            if os.path.lexists(p): os.remove(p)
+        for rel in meta.get("changed", []):
+            p = os.path.join(dest, rel)
+            if os.path.lexists(p): os.remove(p)     # never write through a hardlink
+            os.makedirs(os.path.dirname(p), exist_ok=True)
+            with z.open("files/" + rel) as src, open(p, "wb") as out:
+                shutil.copyfileobj(src, out)
+
+@traced("", lambda tag, entry, index: f"delta {tag}")
+def delta_update(tag, entry, index):
+    """
+    Build the new release as a slot from the installed one plus delta bundles.
+    Returns the slot name, or None when the caller should use the full zip.
+    """
+    if not entry or not entry.get("manifest") or not os.path.isdir(CURRENT):
+        return None
+    chain = _chain(index, installed_version(), entry.get("version"))
+    if not chain:
+        return None
+    try:
+        manifest = http_json(f"{PAGES_BASE}/Versions/{entry['manifest']}")
+    except Exception:
+        return None
+    if not manifest or "files" not in manifest:
+        return None
+
+    slot, final = _new_slot(f"{tag}-delta")      # reserved now, replaced by the finished tree
+    dest = os.path.join(SLOTS_DIR, f".{slot}")
+    try:
+        _clone_tree(os.path.realpath(CURRENT), dest)
+        for d in chain:
+            zpath = cached_archive(d["sha256"]) or \
+                _download(f"{PAGES_BASE}/Versions/{d['path']}", os.path.basename(d["path"]), sha256=d["sha256"])
+            _apply_bundle(zpath, dest)
+        if build_manifest(dest)["files"] != manifest["files"]:
+            raise IOError("patched tree does not match the release manifest")
+        os.rename(dest, final)                  # onto the empty reserved dir
+    except Exception as e:
+        print(f"⮞ delta update unavailable ({e}); fetching full release")
+        shutil.rmtree(dest, ignore_errors=True)
+        shutil.rmtree(final, ignore_errors=True)
+        return None
+    _adopt_legacy()
+    _activate(slot)
+    return slot
+
+def _main(argv):
+    if len(argv) == 3 and argv[0] == "manifest":
+        m = build_manifest(argv[1])
+        with open(argv[2], "w", encoding="utf-8") as f: json.dump(m, f, indent=2)
+        print(json.dumps({"manifest": argv[2]}))
+        return 0
+    if len(argv) == 4 and argv[0] == "bundle":
+        meta = build_bundle(argv[1], argv[2], argv[3])
+        digest = _hash_file(argv[3]).hexdigest()
+        print(f"{len(meta['changed'])} changed, {len(meta['deleted'])} deleted")
+        print(json.dumps({"from": meta["from"], "path": argv[3], "sha256": digest}))
+        return 0
+    print(__doc__.strip())
+    return 1
+
+if __name__ == "__main__":
+    raise SystemExit(_main(sys.argv[1:]))
@@ -0,0 +1,220 @@
+import os, re, time, sqlite3
+from .system import CACHE_DIR, capture_many
+from .search import Pkg, rank
+from . import metrics
+
+# Local search index (per-user) so `solar search` doesn't reload dnf5/flatpak
+# repo metadata on every query. One shard per backend, refreshed on its own.
+INDEX_PATH = os.path.join(CACHE_DIR, "search-index.db")
+INDEX_SCHEMA = 1
+MAX_AGE = 24 * 3600          # refresh even if metadata dirs look untouched
+RETRY_AFTER = 15 * 60        # after a failed listing; doubles per failure in a row, up to MAX_AGE
+
+# Where each backend keeps repo metadata; newest mtime under these is the stamp
+META_DIRS = {
+    "dnf":     ["/var/cache/libdnf5", "~/.cache/libdnf5"],
+    "flatpak": ["/var/lib/flatpak/appstream", "~/.local/share/flatpak/appstream"],
+}
+
+# Full package listings (one line per package, tab separated)
+LIST_CMDS = {
+    "dnf": ["dnf5", "repoquery", "--available", "--latest-limit=1", "--queryformat",
+            "%{name}\t%{version}-%{release}\t%{arch}\t%{repoid}\t%{summary}\n"],
+    "flatpak": ["flatpak", "remote-ls", "--app",
+                "--columns=application,version,arch,origin,name,description"],
+}
+
+_tok = re.compile(r"[a-z0-9]+")
+
+def tokens(text):
+    return set(_tok.findall((text or "").lower()))
+
+def _stamp(backend, depth=3):
+    best = 0.0
+    stack = [(os.path.expanduser(p), 0) for p in META_DIRS.get(backend, [])]
+    while stack:
+        path, d = stack.pop()
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        best = max(best, st.st_mtime)
+        if d >= depth: continue
+        try:
+            with os.scandir(path) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append((e.path, d+1))
+        except OSError:
+            pass
+    return best
+
+# ---------- storage ----------
+def _connect(create=False):
+    if not create and not os.path.isfile(INDEX_PATH):
+        return None
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    db = sqlite3.connect(INDEX_PATH)
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS meta   (backend TEXT PRIMARY KEY, stamp REAL, built REAL, schema INTEGER);
+        CREATE TABLE IF NOT EXISTS failed (backend TEXT PRIMARY KEY, at REAL, count INTEGER);
+        CREATE TABLE IF NOT EXISTS pkgs   (id INTEGER PRIMARY KEY, backend TEXT, name TEXT, version TEXT,
+                                           arch TEXT, remote TEXT, summary TEXT);
+        CREATE TABLE IF NOT EXISTS tokens (token TEXT, pkg INTEGER, PRIMARY KEY (token, pkg)) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS pkgs_key   ON pkgs(backend, name, arch);
+        CREATE INDEX IF NOT EXISTS tokens_pkg ON tokens(pkg);
+    """)
+    return db
+
+def stale_backends(backends, db=None):
+    """Backends whose shard is missing, from an older schema, or older than its metadata."""
+    own = db is None
+    db = db or _connect()
+    if db is None: return list(backends)
+    try:
+        meta = {b: (s, t, v) for b, s, t, v in db.execute("SELECT backend, stamp, built, schema FROM meta")}
+    finally:
+        if own: db.close()
+    now, out = time.time(), []
+    for b in backends:
+        m = meta.get(b)
+        if not m or m[2] != INDEX_SCHEMA or _stamp(b) > m[0] or now - m[1] > MAX_AGE:
+            out.append(b)
+    return out
+
+def _backing_off(db):
+    """Backends whose last listing failed recently enough not to try again yet."""
+    now = time.time()
+    return {b for b, at, n in db.execute("SELECT backend, at, count FROM failed")
+            if now - at < min(RETRY_AFTER * 2 ** (n - 1), MAX_AGE)}
+
+def _built(db):
+    return {r[0] for r in db.execute("SELECT backend FROM meta WHERE schema = ?", (INDEX_SCHEMA,))}
+
+# ---------- listing ----------
+def _parse_listing(backend, out):
+    rows = {}
+    for line in out.splitlines():
+        cols = line.split("\t")
+        if backend == "dnf":
+            if len(cols) < 5: continue
+            name, ver, arch, remote, summary = cols[:5]
+        else:
+            if len(cols) < 4 or "." not in cols[0]: continue
+            cols += [""] * (6 - len(cols))
+            name, ver, arch, remote = cols[:4]
+            summary = " — ".join(c for c in cols[4:6] if c.strip())
+        rows[(name.strip(), arch.strip())] = (ver.strip(), remote.strip(), summary.strip())
+    return rows
+
+def refresh_index(backends, force=False):
+    """
+    Re-list stale backends and apply only the changed rows. Returns refreshed
+    backends. A failed listing is recorded, and that backend isn't listed
+    again until its back-off runs out (unless forced).
+    """
+    db = _connect(create=True)
+    done = []
+    try:
+        todo = [b for b in (backends if force else stale_backends(backends, db)) if b in LIST_CMDS]
+        if not force:
+            wait = _backing_off(db)
+            todo = [b for b in todo if b not in wait]
+        stamps = {b: _stamp(b) for b in todo}
+        for b, code, out in capture_many([(b, LIST_CMDS[b]) for b in todo]):
+            fresh = _parse_listing(b, out) if code == 0 else None
+            if not fresh:               # offline, timed out or empty: back off
+                db.execute("INSERT OR REPLACE INTO failed VALUES (?, ?, 1 + coalesce("
+                           "(SELECT count FROM failed WHERE backend = ?), 0))", (b, time.time(), b))
+                db.commit()
+                continue
+            _apply(db, b, fresh)
+            db.execute("INSERT OR REPLACE INTO meta VALUES (?,?,?,?)", (b, stamps[b], time.time(), INDEX_SCHEMA))
+            db.execute("DELETE FROM failed WHERE backend = ?", (b,))
+            db.commit()
+            done.append(b)
+    finally:
+        db.close()
+    return done
+
+def _apply(db, backend, fresh):
+    have_rows = {(n, a): (i, v, r, s) for i, n, a, v, r, s in
+                 db.execute("SELECT id, name, arch, version, remote, summary FROM pkgs WHERE backend=?", (backend,))}
+    drop = [row[0] for key, row in have_rows.items() if fresh.get(key) != row[1:]]
+    for i in drop:
+        db.execute("DELETE FROM tokens WHERE pkg=?", (i,))
+        db.execute("DELETE FROM pkgs WHERE id=?", (i,))
+    for (name, arch), (ver, remote, summary) in fresh.items():
+        old = have_rows.get((name, arch))
+        if old and old[1:] == (ver, remote, summary): continue
+        cur = db.execute("INSERT INTO pkgs (backend, name, version, arch, remote, summary) VALUES (?,?,?,?,?,?)",
+                         (backend, name, ver, arch, remote, summary))
+        pid = cur.lastrowid
+        db.executemany("INSERT OR IGNORE INTO tokens VALUES (?,?)",
+                       [(t, pid) for t in tokens(name) | tokens(summary)])
+
+# ---------- lookup ----------
+def _term_ids(db, backends, term):
+    # exact + prefix via the token postings, substring via package names
+    marks = ",".join("?" * len(backends))
+    ids = {r[0] for r in db.execute(
+        "SELECT pkg FROM tokens WHERE token >= ? AND token < ?", (term, term + "\uffff"))}
+    if len(term) >= 3:
+        ids.update(r[0] for r in db.execute(
+            f"SELECT id FROM pkgs WHERE backend IN ({marks}) AND instr(lower(name), ?) > 0",
+            (*backends, term)))
+    return ids
+
+def search_index(query, backends):
+    """
+    Answer a search from the local index as far as it can be trusted.
+    Returns (ranked Pkg records from the usable shards, backends the caller
+    should ask directly). A stale shard is still used while its refresh is
+    backing off after a failure; a missing one never is.
+    """
+    backends = [b for b in backends if b in LIST_CMDS]
+    if not backends: return [], []
+    db = _connect()
+    if db is None:
+        metrics.cache(False); return [], backends
+    try:
+        stale = stale_backends(backends, db)
+        if stale: stale = [b for b in stale if b not in (_backing_off(db) & _built(db))]
+        backends = [b for b in backends if b not in stale]
+        metrics.cache(True, len(backends))
+        metrics.cache(False, len(stale))
+        terms = sorted(tokens(query), key=len, reverse=True)
+        if not backends or not terms: return [], stale
+        ids = None
+        for t in terms:
+            got = _term_ids(db, backends, t)
+            ids = got if ids is None else ids & got
+            if not ids: return [], stale
+        marks = ",".join("?" * len(backends))
+        rows, ids = [], sorted(ids)
+        for chunk in range(0, len(ids), 500):
+            part = ids[chunk:chunk+500]
+            rows += db.execute(
+                f"SELECT backend, name, version, arch, remote, summary FROM pkgs "
+                f"WHERE id IN ({','.join('?' * len(part))}) AND backend IN ({marks})",
+                (*part, *backends)).fetchall()
+    finally:
+        db.close()
+    hits = [Pkg(n, v, a, s, b, r) for b, n, v, a, r, s in rows]
+    return sorted(hits, key=lambda p: (rank(p, query), backends.index(p.backend), p.name)), stale
+
+def lookup(names, backends):
+    """Exact-name hits for resolution: {name: {backend: target}}. Stale shards count."""
+    db = _connect()
+    if db is None: return {}
+    out = {}
+    try:
+        for n in names:
+            for b, target in db.execute(
+                    "SELECT backend, name FROM pkgs WHERE name = ? OR (backend = 'flatpak' AND name LIKE ?)",
+                    (n, "%." + n)):
+                if b in backends and (target == n or target.lower().rsplit(".", 1)[-1] == n.lower()):
+                    out.setdefault(n, {}).setdefault(b, target)
+    finally:
+        db.close()
+    return out
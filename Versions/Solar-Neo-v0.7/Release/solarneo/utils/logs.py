@@ -0,0 +1,184 @@
+import os, time, json
+from collections import deque
+
+# Structured log shared by every command: one JSON object per line in
+# LOG_DIR/solar.log. log() only queues a dict; a background thread encodes
+# and writes batches through one buffered handle, and whatever is left is
+# flushed at exit. The active file is rotated to solar.<time>.<pid>.log when
+# it outgrows MAX_BYTES or MAX_AGE, and rotated files are pruned to KEEP files
+# and MAX_TOTAL bytes. Lines are plain JSON, so any collector that tails
+# files can read them; ship() posts the closed ones to an HTTP endpoint.
+LOG_DIR   = os.environ.get("SOLAR_LOG_DIR") or os.path.expanduser("~/.local/share/solarneo/logs")
+LOG_PATH  = os.path.join(LOG_DIR, "solar.log")
+MAX_BYTES = 1 << 20
+MAX_AGE   = 7 * 86400
+MAX_TOTAL = 8 << 20
+KEEP      = 10
+FLUSH_INTERVAL = 1.0
+FLUSH_LINES    = 256
+
+LEVELS = {"debug": 10, "info": 20, "warn": 30, "error": 40, "off": 99}
+LEVEL  = LEVELS.get(os.environ.get("SOLAR_LOG_LEVEL", "info").lower(), 20)
+
+_buf = deque()
+_fh = None
+_opened = 0.0
+_lock = _wake = None
+_ctx = {"pid": os.getpid()}
+
+def log(level, event, **fields):
+    """Queue one record: {"ts", "level", "event", "pid", ...fields}. Never raises, never blocks on disk."""
+    if LEVELS.get(level, 20) < LEVEL: return
+    rec = {"ts": round(time.time(), 3), "level": level, "event": event}
+    rec.update(_ctx)
+    rec.update(fields)
+    _buf.append(rec)
+    if _wake is None: _start()
+    elif len(_buf) >= FLUSH_LINES: _wake.set()
+
+def debug(event, **f):
+    if LEVEL <= 10: log("debug", event, **f)
+def info(event, **f):  log("info", event, **f)
+def warn(event, **f):  log("warn", event, **f)
+def error(event, **f): log("error", event, **f)
+
+def context(**fields):
+    """Fields added to every later record from this process (e.g. the command)."""
+    _ctx.update(fields)
+
+# ---------- writer ----------
+def _start():
+    global _lock, _wake
+    import threading, atexit
+    _lock, _wake = threading.Lock(), threading.Event()
+    threading.Thread(target=_loop, name="solar-log", daemon=True).start()
+    atexit.register(close)
+
+def _loop():
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        flush()
+
+def _first_ts(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.loads(f.readline()).get("ts")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _due(path):
+    """Rotate the file at path? By size, or by the age of its first record."""
+    try:
+        if os.path.getsize(path) >= MAX_BYTES: return True
+    except OSError:
+        return False
+    first = _first_ts(path)
+    return bool(first) and time.time() - first >= MAX_AGE
+
+def _open():
+    global _fh, _opened
+    os.makedirs(LOG_DIR, exist_ok=True)
+    if _due(LOG_PATH): _rotate()
+    _fh = open(LOG_PATH, "a", encoding="utf-8", buffering=1 << 16)
+    _opened = _first_ts(LOG_PATH) or time.time()
+
+def _rotate(force=False):
+    global _fh
+    if _fh is not None:
+        _fh.close()
+        _fh = None
+    if not (force or _due(LOG_PATH)):
+        return                      # another process rotated it already
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+    dest = os.path.join(LOG_DIR, f"solar.{stamp}.{os.getpid()}.log")
+    try: os.rename(LOG_PATH, dest)
+    except OSError: pass
+    prune()
+
+def flush():
+    """Write out everything queued so far."""
+    if not _buf: return
+    with _lock:
+        try:
+            if _fh is None: _open()
+            lines = []
+            while _buf:
+                lines.append(json.dumps(_buf.popleft(), ensure_ascii=False, default=str))
+            _fh.write("\n".join(lines) + "\n")
+            _fh.flush()
+            if _fh.tell() >= MAX_BYTES or time.time() - _opened >= MAX_AGE:
+                _rotate()
+        except OSError:
+            _buf.clear()            # read-only or full disk: logging must not take the command down
+
+def close():
+    global _fh
+    if _lock is None: return
+    flush()
+    with _lock:
+        if _fh is not None:
+            _fh.close()
+            _fh = None
+
+# ---------- retention ----------
+def rotated():
+    """Closed log files, oldest first."""
+    try:
+        names = sorted(n for n in os.listdir(LOG_DIR) if n.startswith("solar.") and n != "solar.log")
+    except OSError:
+        return []
+    return [os.path.join(LOG_DIR, n) for n in names if n.endswith(".log")]
+
+def prune(keep=None, max_total=None):
+    keep = KEEP if keep is None else keep
+    max_total = MAX_TOTAL if max_total is None else max_total
+    old = rotated()
+    sizes = {}
+    for p in old:
+        try: sizes[p] = os.path.getsize(p)
+        except OSError: sizes[p] = 0
+    try: total = sum(sizes.values()) + os.path.getsize(LOG_PATH)
+    except OSError: total = sum(sizes.values())
+    while old and (len(old) > keep or total > max_total):
+        p = old.pop(0)
+        total -= sizes[p]
+        try: os.remove(p)
+        except OSError: pass
+
+# ---------- reading / shipping ----------
+def tail(n=20):
+    """Last n records across the active and rotated files, oldest first."""
+    out = deque(maxlen=n)
+    for path in rotated() + [LOG_PATH]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for ln in f:
+                    try: out.append(json.loads(ln))
+                    except ValueError: pass
+        except OSError:
+            pass
+    return list(out)
+
+def ship(url, timeout=30):
+    """
+    POST every closed log file to url as NDJSON, oldest first, after closing
+    the active one. A file is deleted once the collector accepts it (2xx);
+    the first refusal stops the run. Returns (files sent, files left).
+    """
+    from .system import http_request
+    if _lock is not None:
+        flush()
+        with _lock: _rotate(force=True)
+    elif os.path.exists(LOG_PATH):
+        _rotate(force=True)
+    files, sent = rotated(), 0
+    for path in files:
+        with open(path, "rb") as f: data = f.read()
+        if data:
+            status, _, _ = http_request("POST", url, data, {"Content-Type": "application/x-ndjson"}, timeout)
+            if not 200 <= status < 300: break
+        os.remove(path)
+        sent += 1
+    return sent, len(files) - sent
@@ -0,0 +1,89 @@
+import json
+from .system import detect_backends, installed_names, is_installed, INSTALLERS, REMOVERS
+from .appid import ALIASES, canonical
+
+# Declarative package manifest for `solar apply`:
+#
+#   [dnf]                      {"dnf":     {"install": ["vim-enhanced"]},
+#   install = ["vim-enhanced"]  "flatpak": {"install": ["com.obsproject.Studio"],
+#   [flatpak]                               "remove":  ["org.gnome.Maps"]}}
+#   install = ["com.obsproject.Studio"]
+#   remove  = ["org.gnome.Maps"]
+#
+# A bare list per backend means "install these". Flatpak entries may use the
+# friendly names appid knows ("obs"); they are stored as the app id.
+
+def load(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".toml"):
+        try:
+            import tomllib          # py3.11+
+        except ImportError:
+            raise ValueError("TOML manifests need Python 3.11+; use JSON instead")
+        data = tomllib.loads(raw.decode("utf-8"))
+    else:
+        data = json.loads(raw.decode("utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError("manifest must be a table/object keyed by backend")
+    out = {}
+    for back, spec in data.items():
+        if isinstance(spec, list): spec = {"install": spec}
+        if not isinstance(spec, dict):
+            raise ValueError(f"bad entry for backend '{back}'")
+        out[back] = {k: [_name(back, str(n)) for n in spec.get(k, []) or []] for k in ("install", "remove")}
+    return out
+
+_APP_IDS = set(ALIASES.values())
+
+def _name(back, n):
+    if back != "flatpak": return n.strip()
+    app = canonical(n)
+    return app if app in _APP_IDS else n.strip()
+
+def _present(back, n, snap, probe):
+    """Is n installed per snap? probe: also ask rpm about provides, only worth it for installs."""
+    have = snap.get(back, ())
+    if n in have: return True
+    if back == "flatpak" and "." not in n:      # bare name: flatpak matches the id's last part
+        n = n.lower()
+        return any(a.lower().rsplit(".", 1)[-1] == n for a in have)
+    return probe and is_installed(back, n, snap)
+
+def diff(manifest, snap):
+    """Minimal change set against one installed snapshot: {backend: (add, drop)}."""
+    plan = {}
+    for back, spec in manifest.items():
+        add  = [n for n in spec["install"] if not _present(back, n, snap, True)]
+        drop = [n for n in spec["remove"] if _present(back, n, snap, False)]
+        if add or drop: plan[back] = (add, drop)
+    return plan
+
+def plan(path):
+    """Load the manifest and diff it against one snapshot of installed state."""
+    manifest = load(path)
+    backs = detect_backends()
+    missing = [b for b in manifest if b not in backs]
+    if missing:
+        raise ValueError("backend not available: " + ", ".join(missing))
+    return diff(manifest, installed_names(list(manifest)))
+
+def execute(changes):
+    """
+    Run a plan as batched transactions, then check it against a fresh
+    snapshot: a zero exit doesn't mean every package landed. Returns
+    failures as (backend, verb, rc, names still not converged).
+    """
+    rcs = {}
+    for back, (add, drop) in changes.items():
+        if drop: rcs[back, "remove"] = REMOVERS[back](drop)
+        if add:  rcs[back, "install"] = INSTALLERS[back](add)
+    snap = installed_names(list(changes))
+    fails = []
+    for back, (add, drop) in changes.items():
+        for verb, names, want in (("remove", drop, False), ("install", add, True)):
+            if not names: continue
+            rc = rcs[back, verb]
+            left = [n for n in names if _present(back, n, snap, want) != want]
+            if left or rc: fails.append((back, verb, rc, left))
+    return fails
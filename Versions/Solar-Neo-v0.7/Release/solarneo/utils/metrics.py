@@ -0,0 +1,173 @@
+import os, sys, struct, time
+
+# Per-command metrics in a fixed-size ring file, CACHE_DIR/metrics.bin:
+# a header, then one column per field, CAPACITY slots each. A run writes one
+# slot per column in place (a few pwrites under flock); readers pull whole
+# columns into compact arrays, so `solar stats` never builds a Python object
+# per record. When full, the oldest slot is overwritten.
+CACHE_DIR    = os.path.expanduser("~/.cache/solarneo")    # as system.CACHE_DIR; system imports this module
+METRICS_PATH = os.path.join(CACHE_DIR, "metrics.bin")
+CAPACITY = 4096
+MAGIC, VERSION = b"SLM1", 1
+HEADER = struct.Struct("<4sHHII")            # magic, version, columns, capacity, records ever written
+COLUMNS = (                                   # name, array/struct typecode
+    ("ts",      "I"),                         # unix seconds
+    ("cmd",     "B"),                         # index into CMDS
+    ("backend", "B"),                         # BACKENDS bitmask
+    ("code",    "h"),                         # exit code
+    ("ms",      "f"),                         # wall clock
+    ("bytes",   "I"),                         # bytes downloaded
+    ("hits",    "H"),                         # cache hits
+    ("misses",  "H"),                         # cache misses
+)
+# append-only: the stored index must keep meaning the same command
+CMDS = ("other", "version", "update", "notes", "devnote", "sys", "search", "list",
+        "install", "remove", "apply", "logs", "stats")
+BACKENDS = {"dnf5": 1, "flatpak": 2, "rpm-ostree": 4, "rpm": 8}
+BACKEND_NAMES = {1: "dnf", 2: "flatpak", 4: "rpm-ostree", 8: "rpm"}
+
+# ---------- collection (this process) ----------
+_run = {"backend": 0, "bytes": 0, "hits": 0, "misses": 0}
+
+def backend(args):
+    """Note the backend a command line runs (sudo prefix skipped)."""
+    if args and args[0] == "sudo": args = args[1:]
+    if args: _run["backend"] |= BACKENDS.get(os.path.basename(args[0]), 0)
+
+def downloaded(n):
+    _run["bytes"] += n
+
+def cache(hit, n=1):
+    _run["hits" if hit else "misses"] += n
+
+def _offsets(capacity):
+    off, out = HEADER.size, {}
+    for name, code in COLUMNS:
+        out[name] = (off, struct.calcsize("<" + code))
+        off += out[name][1] * capacity
+    return out, off
+
+def record(cmd, code, ms):
+    """Store this run in the ring. Best effort: metrics never fail a command."""
+    import fcntl
+    vals = dict(_run, ts=int(time.time()), cmd=CMDS.index(cmd) if cmd in CMDS else 0,
+                code=max(-32768, min(32767, int(code or 0))), ms=ms, bytes=min(_run["bytes"], 0xFFFFFFFF),
+                hits=min(_run["hits"], 0xFFFF), misses=min(_run["misses"], 0xFFFF))
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd = os.open(METRICS_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        head = _header(fd)
+        if head is None:                      # new, foreign or older layout: start over
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, _offsets(CAPACITY)[1])
+            head = CAPACITY, 0
+        capacity, written = head
+        offs = _offsets(capacity)[0]
+        slot = written % capacity
+        for name, code in COLUMNS:
+            off, size = offs[name]
+            os.pwrite(fd, struct.pack("<" + code, vals[name]), off + slot * size)
+        os.pwrite(fd, HEADER.pack(MAGIC, VERSION, len(COLUMNS), capacity, written + 1), 0)
+    except (OSError, struct.error):
+        pass
+    finally:
+        os.close(fd)
+
+def _header(fd):
+    raw = os.pread(fd, HEADER.size, 0)
+    if len(raw) < HEADER.size: return None
+    magic, version, ncols, capacity, written = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION or ncols != len(COLUMNS) or not capacity: return None
+    if os.fstat(fd).st_size < _offsets(capacity)[1]: return None
+    return capacity, written
+
+# ---------- reading ----------
+def load(path=None):
+    """{column: array} oldest first, or None when there's no metrics file yet."""
+    from array import array
+    try:
+        fd = os.open(path or METRICS_PATH, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        head = _header(fd)
+        if head is None: return None
+        capacity, written = head
+        n, start = min(written, capacity), written % capacity if written > capacity else 0
+        offs, cols = _offsets(capacity)[0], {}
+        for name, code in COLUMNS:
+            off, size = offs[name]
+            a = array(code)
+            if a.itemsize != size:            # platform without a matching C type
+                a = array("l" if code in "Ih" else "d" if code == "f" else code)
+                a.extend(x[0] for x in struct.iter_unpack("<" + code, os.pread(fd, size * n, off)))
+            else:
+                a.frombytes(os.pread(fd, size * n, off))
+                if sys.byteorder == "big": a.byteswap()
+            cols[name] = a[start:] + a[:start] if start else a
+        return cols
+    finally:
+        os.close(fd)
+
+def percentile(sorted_xs, p):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_xs: return None
+    import math
+    return sorted_xs[max(0, min(len(sorted_xs), math.ceil(p / 100 * len(sorted_xs))) - 1)]
+
+def summarize(cols, since=0, split=None):
+    """
+    Per command: runs, failures, p50/p90/p99/max ms, bytes, cache hits/misses
+    and backends seen, over records newer than since. With split (a unix
+    time), also the p50 of runs before and after it, for trends. One pass
+    over the columns; only each command's durations are kept, for sorting.
+    """
+    from array import array
+    acc = {}        # cmd index -> [runs, failures, bytes, hits, misses, backends, ms, ms before split, ms after]
+    for t, ci, b, code, ms, n, h, m in zip(cols["ts"], cols["cmd"], cols["backend"], cols["code"],
+                                           cols["ms"], cols["bytes"], cols["hits"], cols["misses"]):
+        if t < since: continue
+        a = acc.get(ci)
+        if a is None: a = acc[ci] = [0, 0, 0, 0, 0, 0, array("d"), array("d"), array("d")]
+        ms = round(ms, 1)                   # float32 on disk
+        a[0] += 1; a[1] += code != 0; a[2] += n; a[3] += h; a[4] += m; a[5] |= b
+        a[6].append(ms)
+        if split: a[7 if t < split else 8].append(ms)
+    out = {}
+    for ci, (runs, fails, nbytes, hits, misses, mask, ms, before, after) in sorted(acc.items()):
+        srt = sorted(ms)
+        s = {"runs": runs, "failures": fails,
+             "p50": percentile(srt, 50), "p90": percentile(srt, 90), "p99": percentile(srt, 99),
+             "max": srt[-1], "sum_ms": round(sum(srt), 1), "bytes": nbytes, "hits": hits, "misses": misses,
+             "backends": [name for bit, name in sorted(BACKEND_NAMES.items()) if mask & bit]}
+        if split:
+            s["p50_before"], s["p50_after"] = percentile(sorted(before), 50), percentile(sorted(after), 50)
+        out[CMDS[ci] if ci < len(CMDS) else f"cmd{ci}"] = s
+    return out
+
+def prometheus(stats, oldest=None):
+    """Text exposition for node-exporter's textfile collector. Values cover the ring's window, hence gauges."""
+    def esc(v): return str(v).replace("\\", "\\\\").replace('"', '\\"')
+    lines = [
+        "# HELP solar_command_duration_seconds Wall clock of solar commands over the stored window.",
+        "# TYPE solar_command_duration_seconds gauge",
+    ]
+    for cmd, s in sorted(stats.items()):
+        for q in ("50", "90", "99"):
+            lines.append(f'solar_command_duration_seconds{{cmd="{esc(cmd)}",quantile="0.{q}"}} {s["p" + q] / 1000:.6f}')
+    for name, key, help_ in (("solar_command_runs", "runs", "Runs in the stored window."),
+                             ("solar_command_failures", "failures", "Runs with a non-zero exit code."),
+                             ("solar_command_download_bytes", "bytes", "Bytes downloaded."),
+                             ("solar_command_cache_hits", "hits", "Local cache hits."),
+                             ("solar_command_cache_misses", "misses", "Local cache misses.")):
+        lines += [f"# HELP {name} {help_}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{cmd="{esc(cmd)}"}} {s[key]}' for cmd, s in sorted(stats.items())]
+    if oldest:
+        lines += ["# HELP solar_metrics_window_start_seconds Time of the oldest stored run.",
+                  "# TYPE solar_metrics_window_start_seconds gauge",
+                  f"solar_metrics_window_start_seconds {oldest}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,243 @@
+import os, re, json, time
+from http.client import HTTPException
+from urllib.error import HTTPError
+from .system import CACHE_DIR, api_get, api_post
+from .appid import canonical
+from . import metrics
+
+# Offline-first notes: one local shard per app, synced incrementally, plus a
+# durable outbox for posts made while the API is unreachable.
+NOTES_DIR   = os.path.join(CACHE_DIR, "notes")
+OUTBOX      = os.path.join(NOTES_DIR, "outbox.jsonl")
+NOTES_TTL   = 10 * 60        # serve local without asking the API for this long
+NET_TIMEOUT = 4
+PAGE        = 10             # notes per view
+SYNC_PAGE   = 50             # newest notes fetched on an app's first sync; older ones on demand
+BULK_MAX    = 500            # apps per notes_bulk request (the server's MAX_BULK)
+
+KINDS = ("community", "developer")
+
+def _shard(app):
+    # one shard per canonical id, whatever casing/alias the caller used
+    return os.path.join(NOTES_DIR, re.sub(r"[^A-Za-z0-9._-]", "_", canonical(app)) + ".json")
+
+def load_local(app):
+    try:
+        with open(_shard(app), "r", encoding="utf-8") as f:
+            d = json.load(f)
+    except Exception:
+        d = {}
+    for k in KINDS: d.setdefault(k, [])
+    d.setdefault("synced", 0)
+    d.setdefault("since", 0)
+    d.setdefault("next", None)  # server cursor: older notes exist that we haven't fetched
+    return d
+
+def _save_local(app, d):
+    os.makedirs(NOTES_DIR, exist_ok=True)
+    path = _shard(app)
+    with open(path + ".tmp", "w", encoding="utf-8") as f: json.dump(d, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+def _merge(old, new):
+    seen = {(n.get("time"), n.get("msg")) for n in old}
+    out = old + [n for n in new if (n.get("time"), n.get("msg")) not in seen]
+    out.sort(key=lambda n: n.get("time", 0))
+    return out
+
+def sync(app):
+    """Fetch only notes newer than the newest `time` we hold. Raises when offline."""
+    d = load_local(app)
+    params = {"cmd": "notes", "app": canonical(app)}
+    if d["since"]:
+        params["since"] = d["since"]
+    elif not (d["community"] or d["developer"]):
+        params["limit"] = SYNC_PAGE
+    j = api_get(params, timeout=NET_TIMEOUT)
+    if j is None: raise IOError("bad response from notes API")
+    # the server caps every answer, so even a `since` sync can leave older notes behind a cursor
+    if "limit" in params or j.get("next"): d["next"] = j.get("next")
+    return _absorb(app, d, j)
+
+def fetch_older(app, d):
+    """Pull the page of notes before d["next"] into the local store."""
+    params = {"cmd": "notes", "app": canonical(app), "before": d["next"], "limit": SYNC_PAGE}
+    j = api_get(params, timeout=NET_TIMEOUT)
+    if j is None: raise IOError("bad response from notes API")
+    d["next"] = j.get("next")
+    return _absorb(app, d, j, synced=d["synced"])
+
+def _absorb(app, d, j, synced=None):
+    for k in KINDS:
+        d[k] = _merge(d[k], j.get(k, []) or [])
+    d["since"] = max([n.get("time", 0) for k in KINDS for n in d[k]] + [d["since"]])
+    d["synced"] = time.time() if synced is None else synced
+    _save_local(app, d)
+    return d
+
+def _bisect(notes, t):
+    # index of the first note at or after time t; notes are kept sorted by time
+    lo, hi = 0, len(notes)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if notes[mid].get("time", 0) < t: lo = mid + 1
+        else: hi = mid
+    return lo
+
+def page(d, limit=PAGE, before=None):
+    """
+    The newest `limit` notes (both kinds together) older than `before`.
+    Returns ({kind: notes}, cursor) where cursor is the `before` for the
+    next older page, or None when nothing older is known to exist.
+    """
+    ends = {k: _bisect(d[k], before) if before else len(d[k]) for k in KINDS}
+    starts = dict(ends)
+    for _ in range(limit or sum(ends.values())):
+        # step back through whichever kind has the newer note
+        k = max((k for k in KINDS if starts[k] > 0), default=None,
+                key=lambda k: d[k][starts[k] - 1].get("time", 0))
+        if k is None: break
+        starts[k] -= 1
+    shown = [d[k][i].get("time", 0) for k in KINDS for i in range(starts[k], ends[k])]
+    low = min(shown) if shown else before
+    for k in KINDS:         # never split a tie: the cursor is a time
+        while shown and starts[k] > 0 and d[k][starts[k] - 1].get("time", 0) == low:
+            starts[k] -= 1
+    out = {k: d[k][starts[k]:ends[k]] for k in KINDS}
+    if not (any(starts.values()) or d["next"]):
+        return out, None
+    return out, low
+
+def get(app, max_age=NOTES_TTL, limit=PAGE, before=None):
+    """
+    A page of notes for app from the local store (the newest by default,
+    older ones with before=<cursor>), synced first when older than max_age.
+    Older pages missing locally are fetched from the API on demand. The
+    result carries stale=True when the API couldn't be reached and
+    before=<cursor> when there is an older page.
+    """
+    d = load_local(app)
+    stale = False
+    metrics.cache(time.time() - d["synced"] <= max_age)
+    if time.time() - d["synced"] > max_age:
+        try:
+            d = sync(app)
+        except Exception:
+            stale = True
+        else:
+            flush_outbox()      # we're online again: send what was queued
+    if d["next"] and not stale:
+        held = sum(_bisect(d[k], before) if before else len(d[k]) for k in KINDS)
+        if limit and held < limit:
+            try:
+                d = fetch_older(app, d)
+            except Exception:
+                stale = True
+    return _view(d, stale, limit, before)
+
+def _view(d, stale, limit=PAGE, before=None):
+    notes, cursor = page(d, limit, before)
+    return {"community": notes["community"], "developer": notes["developer"],
+            "before": cursor, "synced": d["synced"], "stale": stale}
+
+def get_many(apps, max_age=NOTES_TTL, limit=PAGE):
+    """
+    Like get() for many apps. Fresh shards are served locally; the rest are
+    synced with one notes_bulk request per BULK_MAX apps (per-app requests
+    over the same keep-alive connection if the API doesn't know notes_bulk).
+    """
+    names = {a: canonical(a) for a in apps if a.strip()}
+    ids = list(dict.fromkeys(names.values()))
+    now, out = time.time(), {}
+    local = {a: load_local(a) for a in ids}
+    todo = [a for a in ids if now - local[a]["synced"] > max_age]
+    metrics.cache(True, len(ids) - len(todo))
+    metrics.cache(False, len(todo))
+    fetched = {}                      # app -> its bulk answer, or None: sync it on its own
+    for i in range(0, len(todo), BULK_MAX):
+        chunk = todo[i:i + BULK_MAX]
+        try:
+            j = api_post({"cmd": "notes_bulk"},
+                         {"apps": chunk, "since": {a: local[a]["since"] for a in chunk},
+                          "limit": SYNC_PAGE},
+                         timeout=NET_TIMEOUT)
+            notes = j.get("notes") if j and j.get("ok") else None
+        except HTTPError:
+            notes = None              # reachable, but no notes_bulk there
+        except Exception:
+            break                     # offline: this chunk and the rest stay as they are
+        if notes is None:
+            fetched.update((a, None) for a in todo[i:])
+            break
+        fetched.update((a, notes.get(a) or {}) for a in chunk)
+    stale = {a for a in todo if a not in fetched}
+    for a in todo:
+        if a in stale: continue
+        try:
+            if fetched[a] is None:
+                local[a] = sync(a)
+                continue
+            got = fetched[a]
+            if got.get("next") or not local[a]["since"]: local[a]["next"] = got.get("next")
+            local[a] = _absorb(a, local[a], got)
+        except Exception:
+            stale.add(a)
+    for name, a in names.items():
+        out[name] = _view(local[a], a in stale, limit)
+    return out
+
+# ---------- outbox ----------
+def _queue(cmd, body):
+    os.makedirs(NOTES_DIR, exist_ok=True)
+    fd = os.open(OUTBOX, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)   # may hold dev tokens
+    with os.fdopen(fd, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"cmd": cmd, "body": body, "queued": time.time()}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def pending():
+    try:
+        with open(OUTBOX, "r", encoding="utf-8") as f:
+            return [json.loads(ln) for ln in f if ln.strip()]
+    except (OSError, ValueError):
+        return []
+
+def flush_outbox():
+    """Send queued posts in order; stop at the first network failure. Returns sent count."""
+    items, sent = pending(), 0
+    if not items: return 0
+    keep = []
+    for i, it in enumerate(items):
+        try:
+            api_post({"cmd": it["cmd"]}, it["body"], timeout=NET_TIMEOUT)
+            sent += 1
+        except HTTPError:
+            pass                # rejected (bad token, too long…): retrying won't help, drop it
+        except (OSError, HTTPException):
+            keep = items[i:]
+            break
+    tmp = OUTBOX + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for it in keep: f.write(json.dumps(it) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, OUTBOX)
+    return sent
+
+def post(cmd, body):
+    """'posted', 'queued' (offline, will retry) or '' (rejected by the API)."""
+    body = dict(body, app=canonical(body["app"]))
+    try:
+        r = api_post({"cmd": cmd}, body, timeout=NET_TIMEOUT)
+    except HTTPError:
+        return ""               # the API answered and refused; queueing would only resend it
+    except (OSError, HTTPException):
+        _queue(cmd, body)       # unreachable, timed out or dropped: URLError and socket.timeout are OSErrors
+        return "queued"
+    flush_outbox()
+    if not (r and r.get("ok")): return ""
+    d = load_local(body["app"])
+    d["synced"] = 0             # pick up our own note on the next read
+    _save_local(body["app"], d)
+    return "posted"
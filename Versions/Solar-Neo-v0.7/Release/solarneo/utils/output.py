@@ -0,0 +1,35 @@
+import os, sys, json
+
+# Machine-readable output for --json / --ndjson. Records go to the real
+# stdout; everything else (banners, progress, backend tool output) is moved
+# to stderr so the stream stays parseable.
+MODES = ("--json", "--ndjson")
+
+MODE = None          # None (human), "json" (one array at exit) or "ndjson" (a line per record)
+_out = None
+_buf = []
+
+def setup(mode):
+    global MODE, _out
+    MODE = mode
+    sys.stdout.flush()
+    _out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)      # children and stray prints inherit fd 1: point it at stderr
+
+def machine():
+    return MODE is not None
+
+def emit(kind, **fields):
+    """One record: {"type": kind, ...}. Streamed right away in ndjson mode."""
+    rec = dict(type=kind, **fields)
+    if MODE == "ndjson":
+        _out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        _out.flush()
+    else:
+        _buf.append(rec)
+
+def finish():
+    if MODE == "json":
+        json.dump(_buf, _out, ensure_ascii=False)
+        _out.write("\n")
+    if _out: _out.flush()
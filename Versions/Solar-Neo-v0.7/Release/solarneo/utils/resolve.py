@@ -0,0 +1,119 @@
+import os, json, time
+from .system import CACHE_DIR, capture_many, detect_backends, looks_like_app_id, pick_backend
+from .appid import ALIASES, canonical
+from . import metrics
+
+# Name -> backend resolution, memoized across runs so repeat installs and
+# removes go straight to the right backend (and the right sudo prompt).
+MEMO_PATH   = os.path.join(CACHE_DIR, "resolve.json")
+MEMO_TTL    = 7 * 24 * 3600
+MEMO_MAX    = 2000
+
+_memo = None
+_APP_IDS = set(ALIASES.values())
+
+def _load():
+    global _memo
+    if _memo is None:
+        try:
+            with open(MEMO_PATH, "r", encoding="utf-8") as f:
+                _memo = json.load(f)
+        except Exception:
+            _memo = {}
+        now = time.time()
+        _memo = {k: v for k, v in _memo.items() if now - v.get("at", 0) < MEMO_TTL}
+    return _memo
+
+def _save():
+    memo = _load()
+    if len(memo) > MEMO_MAX:
+        keep = sorted(memo.items(), key=lambda kv: kv[1]["at"], reverse=True)[:MEMO_MAX]
+        memo.clear(); memo.update(keep)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = MEMO_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(memo, f)
+        os.replace(tmp, MEMO_PATH)
+    except OSError:
+        pass
+
+def remember(name, backend, target):
+    _load()[name] = {"backend": backend, "target": target, "at": time.time()}
+
+def forget(name):
+    if _load().pop(name, None) is not None: _save()
+
+def _from_index(names, backs):
+    # a stale index is still good enough to tell an RPM from an app id
+    try:
+        from .index import lookup
+        return lookup(names, backs)
+    except Exception:
+        return {}
+
+def _probe(names, backs):
+    """Ask the backends about names the index didn't know: {name: {backend: target}}."""
+    jobs = []
+    if "dnf" in backs:
+        jobs.append(("dnf", ["dnf5", "repoquery", "--queryformat", "%{name}\n"] + names))
+    if "flatpak" in backs:      # one listing answers every name, however many there are
+        jobs.append(("flatpak", ["flatpak", "remote-ls", "--app", "--columns=application"]))
+    found = {n: {} for n in names}
+    for back, code, out in capture_many(jobs):
+        if code != 0: continue
+        lines = [ln.strip() for ln in out.splitlines() if ln.strip()]
+        if back == "dnf":
+            for n in names:
+                if n in lines: found[n]["dnf"] = n
+        else:
+            apps = {}
+            for a in lines:     # 'firefox' finds org.mozilla.firefox; the first remote listed wins
+                apps.setdefault(a.lower(), a)
+                apps.setdefault(a.lower().rsplit(".", 1)[-1], a)
+            for n in names:
+                app = apps.get(n.strip().lower())
+                if app: found[n]["flatpak"] = app
+    return found
+
+def resolve_many(names, snap=None):
+    """
+    Decide backend + target for each name: {name: (backend, target)}.
+    snap (installed_names()) makes installed state win, which is what
+    remove wants. Decisions backed by metadata are memoized.
+    """
+    backs = detect_backends()
+    memo, out, todo, dirty = _load(), {}, [], False
+    for n in names:
+        app = canonical(n)
+        if snap is not None:
+            hit = next(((b, t) for b in backs for t in (n, app)
+                        if t and t in snap.get(b, ())), None)
+            if hit:
+                out[n] = hit
+                remember(n, *hit); dirty = True
+                continue
+        m = memo.get(n)
+        if m and m["backend"] in backs:
+            out[n] = (m["backend"], m["target"])
+        elif "flatpak" in backs and app in _APP_IDS:
+            out[n] = ("flatpak", app)
+        elif "flatpak" in backs and looks_like_app_id(n):
+            out[n] = ("flatpak", n)
+        else:
+            todo.append(n)
+    metrics.cache(True, len(names) - len(todo))
+    metrics.cache(False, len(todo))
+    if todo:
+        known = _from_index(todo, backs)
+        rest = [n for n in todo if not known.get(n)]
+        if rest: known.update(_probe(rest, backs))
+        for n in todo:
+            found = known.get(n) or {}
+            b = next((b for b in backs if b in found), None)
+            if b:
+                out[n] = (b, found[b])
+                remember(n, b, found[b]); dirty = True
+            else:
+                out[n] = (pick_backend(n), n)   # unknown: let the default backend report it
+    if dirty: _save()
+    return out
@@ -1,16 +1,13 @@
-import os, sys, datetime
-from .system import (
-    ensure_dirs, latest_version, installed_version,
-    get_notes, add_note, add_dev_note, update_to
-)
+import os
 from .colors import blue, green, yellow, red, mag, cyan, dim, banner
-from .. import __version__
-from .system import (
-    install_pkg, remove_pkg, search_pkgs, detect_backends
-)
 
+# Each command imports what it needs when it runs, so `solar` stays cheap to
+# start (shell completions and scripts call it a lot). See bench/startup.py.
+
+out = None      # utils.output under --json/--ndjson: commands emit records instead of text
 
 def fmt_time(ms):
+    import datetime
     try:
         dt = datetime.datetime.fromtimestamp(ms/1000.0)
         return dt.strftime("%b %d %Y")
@@ -18,20 +15,27 @@ def fmt_time(ms):
         return "unknown"
 
 def ui_head():
+    if out: return
     print(banner("Solar Neo CLI"))
     print(dim("A Pakage manager built for you\n"))
 
-def cmd_version():
+def cmd_version(args=()):
+    from .system import installed_version, latest_version, update_to
+    from .version import newer
     ui_head()
     curr = installed_version()
+    if out:
+        lv = latest_version(background=True)
+        out.emit("version", current=curr, latest=lv, up_to_date=not newer(lv, curr) if lv else None)
+        return 0
     print(cyan("⮞ ") + "current: " + green(curr))
-    lv = latest_version()
+    lv = latest_version(background=True)
     if not lv:
         print(yellow("⮞ ") + "latest : (offline)")
         return 0
     print(cyan("⮞ ") + "latest : " + blue(lv))
     print()
-    if lv == curr:
+    if not newer(lv, curr):             # '0.8' is 'v0.8'; a dev build ahead of latest is fine too
         print(green("status: up-to-date ✓"))
         return 0
     print(red("status: outdated ✗"))
@@ -43,16 +47,43 @@ def cmd_version():
         else:  print(red(f"\nupdate failed: {msg}"))
     return 0
 
-def cmd_update():
+def cmd_update(args=()):
+    from .system import installed_version, latest_version, latest_release, update_to
+    from .version import newer, same, CHANNEL
     ui_head()
+    if "--rollback" in args:
+        from .system import rollback
+        ok, msg = rollback()
+        if out: out.emit("rollback", ok=ok, detail=msg)
+        else: print(green(f"rolled back to {msg} ✓") if ok else red(f"rollback failed: {msg}"))
+        return 0 if ok else 1
+    channel = next((args[i + 1] for i, a in enumerate(args[:-1]) if a == "--channel"), None) \
+        or os.environ.get("SOLAR_CHANNEL") or CHANNEL
     curr = installed_version()
-    lv = latest_version()
-    if not lv:
-        print(red("cannot reach update server")); return 1
-    if lv == curr:
-        print(green("already up-to-date ✓")); return 0
+    if channel != CHANNEL:
+        # the index decides; moving to another channel may mean going back a version
+        lv = latest_release(channel)
+        if not lv:
+            print(red(f"no Solar Neo release on channel '{channel}'")); return 1
+        current = same(lv, curr)
+    else:
+        lv = latest_version(max_age=0) or latest_release(CHANNEL)   # conditional request; cheap when unchanged
+        if not lv:
+            print(red("cannot reach update server")); return 1
+        current = not newer(lv, curr)
+    if current:
+        if out: out.emit("update", current=curr, latest=lv, status="up-to-date")
+        else: print(green("already up-to-date ✓"))
+        return 0
+    if out:             # no prompt in machine mode: installing takes an explicit --yes
+        if "--yes" not in args:
+            out.emit("update", current=curr, latest=lv, status="available"); return 0
+        ok, msg = update_to(lv)
+        out.emit("update", current=curr, latest=lv, status="updated" if ok else "failed",
+                 **({} if ok else {"error": msg}))
+        return 0 if ok else 1
     print(yellow(f"update → {lv}"));
-    ans = input("Proceed? [Y/n] ").strip().lower()
+    ans = "y" if "--yes" in args else input("Proceed? [Y/n] ").strip().lower()
     if ans in ("", "y", "yes"):
         ok, msg = update_to(lv)
         if ok: print(green("update complete ✓"))
@@ -60,24 +91,52 @@ def cmd_update():
     return 0
 
 def cmd_notes(args):
+    from .system import get_notes, get_notes_bulk, add_note
     ui_head()
     if len(args) < 1:
-        print(red("usage: solar notes <app> [add [text]]")); return 1
+        print(red("usage: solar notes <app> [app…] [--limit N] [--before CURSOR] | solar notes <app> add [text]")); return 1
     app = args[0]
     if len(args) >= 2 and args[1] == "add":
         text = " ".join(args[2:]) if len(args) >= 3 else input("note: ").strip()
         if not text:
             print(yellow("cancelled")); return 1
-        if add_note(app, text):
-            print(green("note posted ✓"))
-        else:
-            print(red("failed to post note"))
+        st = add_note(app, text)
+        if out:
+            out.emit("note", app=app, kind="community", status=st or "rejected")
+            return 0 if st else 1
+        if st == "posted":   print(green("note posted ✓"))
+        elif st == "queued": print(yellow("offline: note queued, it will be sent next time ✓"))
+        else:                print(red("failed to post note"))
         return 0
 
-    # view
-    data = get_notes(app)
+    # view: newest page first, --before <cursor> pages back (several apps: one bulk round trip)
+    opts, apps, it = {}, [], iter(args)
+    for a in it:
+        if a in ("--limit", "--before"):
+            try: opts[a[2:]] = int(next(it))
+            except (StopIteration, ValueError):
+                print(red(f"{a} needs a number")); return 1
+        else:
+            apps.append(a)
+    if len(apps) > 1:
+        res = get_notes_bulk(apps)
+    elif apps:
+        res = {apps[0]: get_notes(apps[0], **opts)}
+    else:
+        return cmd_notes([])
+    for i, (name, data) in enumerate(res.items()):
+        if out:
+            out.emit("notes", app=name, **data); continue
+        if i: print()
+        show_notes(name, data)
+    return 0
+
+def show_notes(app, data):
     comm = data.get("community",[]) or []
     dev  = data.get("developer",[]) or []
+    if data.get("stale"):
+        when = fmt_time(data["synced"]*1000) if data.get("synced") else "never"
+        print(yellow(f"(offline: showing notes cached {when})"))
     print(blue(f"Community notes for {app}:"))
     if not comm:
         print(dim("  (no community notes)"))
@@ -91,9 +150,11 @@ def cmd_notes(args):
     else:
         for n in dev:
             print(f"  - [{fmt_time(n.get('time',0))}] {n.get('msg','').strip()}")
-    return 0
+    if data.get("before"):
+        print(dim(f"\n  older notes: solar notes {app} --before {data['before']}"))
 
 def cmd_devnote(args):
+    from .system import add_dev_note
     ui_head()
     if len(args) < 1:
         print(red('usage: solar devnote add <app> ["text"]')); return 1
@@ -106,65 +167,268 @@ def cmd_devnote(args):
         print(red("missing SOLAR_DEV_TOKEN")); return 1
     if not text:
         print(yellow("cancelled")); return 1
-    if add_dev_note(app, text, token):
-        print(green("dev note posted ✓"))
-    else:
-        print(red("failed to post dev note"))
+    st = add_dev_note(app, text, token)
+    if out:
+        out.emit("note", app=app, kind="developer", status=st or "rejected")
+        return 0 if st else 1
+    if st == "posted":   print(green("dev note posted ✓"))
+    elif st == "queued": print(yellow("offline: dev note queued, it will be sent next time ✓"))
+    else:                print(red("failed to post dev note"))
     return 0
 
 
-def cmd_sys():
+def cmd_sys(args=()):
+    from .system import detect_backends
+    from .caps import caps
     ui_head()
+    c = caps()
+    if out:
+        tools = {n: t and {"path": t["path"], "version": t["version"]} for n, t in c["tools"].items()}
+        out.emit("sys", backends=detect_backends(), tools=tools, remotes=c["remotes"],
+                 immutable=c["immutable"])
+        return 0
     print("⮞ backends:", ", ".join(detect_backends()) or "none")
+    for name, t in c["tools"].items():
+        print(f"  {name:<10} " + (green(t["version"] or "yes") + dim(f"  {t['path']}") if t else dim("no")))
+    print("⮞ flatpak remotes:", ", ".join(c["remotes"]) or "none")
+    print("⮞ immutable OS:", yellow("yes (rpm-ostree/bootc)") if c["immutable"] else "no")
     return 0
 
 def cmd_search(args):
+    from .system import search_pkgs
     ui_head()
     if not args: return usage() or 1
-    if not search_pkgs(" ".join(args)):
+    if out:
+        search_pkgs(" ".join(args), on_result=lambda p: out.emit("package", **p._asdict()))
+    elif not search_pkgs(" ".join(args)):
         print("no matches")
     return 0
 
+def cmd_list(args=()):
+    from .system import list_pkgs
+    ui_head()
+    res = list_pkgs()
+    if not res:
+        print(red("no backend available")); return 1
+    for back, code, text in res:
+        if out:
+            out.emit("installed", backend=back, ok=code == 0, code=code,
+                     lines=[ln for ln in text.splitlines() if ln.strip()] if code == 0 else [])
+            continue
+        print(blue(f"--- {back} ---"))
+        print(text.rstrip() if code == 0 else red(f"({back} query failed: exit {code})"))
+    return 0
+
+def _report(results, done):
+    bad = 0
+    for name, ok, msg in results:
+        if out: out.emit("result", name=name, action=done, ok=ok, msg=msg)
+        else: print(green(f"✔ {name}: {done}") if ok else red(f"✗ {name}: {msg}"))
+        bad += not ok
+    return 0 if not bad else 1
+
 def cmd_install(args):
+    from .system import install_pkgs
     ui_head()
     if not args: return usage() or 1
-    ok,msg = install_pkg(args[0])
-    print("✔ done" if ok else f"✗ {msg}")
-    return 0 if ok else 1
+    return _report(install_pkgs(args), "done")
 
 def cmd_remove(args):
+    from .system import remove_pkgs
     ui_head()
     if not args: return usage() or 1
-    ok,msg = remove_pkg(args[0])
-    print("✔ removed" if ok else f"✗ {msg}")
-    return 0 if ok else 1
+    return _report(remove_pkgs(args), "removed")
+
+def cmd_apply(args):
+    from .manifest import plan, execute
+    ui_head()
+    paths = [a for a in args if not a.startswith("-")]
+    if len(paths) != 1:
+        print(red("usage: solar apply <manifest.toml|.json> [--dry-run]")); return 1
+    try:
+        changes = plan(paths[0])
+    except (OSError, ValueError) as e:
+        print(red(f"cannot apply manifest: {e}")); return 1
+    dry = "--dry-run" in args
+    if out:
+        for back, (add, drop) in changes.items():
+            out.emit("change", backend=back, install=add, remove=drop)
+        fails = [] if dry else execute(changes)
+        out.emit("apply", dry_run=dry, converged=not changes,
+                 failures=[{"backend": b, "verb": v, "code": rc, "packages": left} for b, v, rc, left in fails])
+        return 1 if fails else 0
+    if not changes:
+        print(green("already converged ✓")); return 0
+    for back, (add, drop) in changes.items():
+        if add:  print(cyan(f"⮞ {back} +") + " " + " ".join(add))
+        if drop: print(yellow(f"⮞ {back} -") + " " + " ".join(drop))
+    if dry:
+        print(dim("(dry run, nothing changed)")); return 0
+    fails = execute(changes)
+    for back, verb, rc, left in fails:
+        print(red(f"✗ {back} {verb} failed" + (f" (exit {rc})" if rc else "") + (": " + " ".join(left) if left else "")))
+    if not fails: print(green("apply complete ✓"))
+    return 1 if fails else 0
+
+def cmd_logs(args):
+    from . import logs
+    ui_head()
+    if "--ship" in args:
+        rest = args[args.index("--ship") + 1:]
+        url = rest[0] if rest and not rest[0].startswith("-") else os.environ.get("SOLAR_LOG_URL")
+        if not url:
+            print(red("usage: solar logs --ship <url>   (or set SOLAR_LOG_URL)")); return 1
+        try:
+            sent, left = logs.ship(url)
+        except Exception as e:
+            sent, left, err = 0, None, str(e)
+        else:
+            err = None if not left else "collector refused a file"
+        if out: out.emit("ship", url=url, sent=sent, left=left, **({"error": err} if err else {}))
+        elif err: print(red(f"shipped {sent} file(s); stopped: {err}"))
+        else: print(green(f"shipped {sent} log file(s) ✓"))
+        return 1 if err else 0
+    n = int(args[0]) if args and args[0].isdigit() else 20
+    for r in logs.tail(n):
+        if out:
+            out.emit("log", **r); continue
+        import time
+        extra = " ".join(f"{k}={v}" for k, v in r.items() if k not in ("ts", "level", "event", "pid"))
+        level = r.get("level", "?")
+        color = {"warn": yellow, "error": red}.get(level, dim)
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r.get('ts', 0)))} "
+              f"{color(f'{level:<5}')} {r.get('event')} {extra}")
+    if not out: print(dim(f"({logs.LOG_PATH})"))
+    return 0
+
+def _human_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB": return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+def cmd_stats(args):
+    import time
+    from . import metrics
+    if "--prom" not in args: ui_head()      # the exposition text must stay clean
+    days = None
+    if "--days" in args:
+        try: days = float(args[args.index("--days") + 1])
+        except (IndexError, ValueError): days = None
+        if not (days and days > 0):
+            print(red("--days needs a positive number")); return 1
+    cols = metrics.load()
+    if not cols or not len(cols["ts"]):
+        if out: out.emit("stats", commands=0)
+        else: print(yellow("no metrics recorded yet"))
+        return 0
+    now = time.time()
+    since = now - days * 86400 if days else 0
+    oldest = max(since, min(cols["ts"]))
+    stats = metrics.summarize(cols, since, split=oldest + (now - oldest) / 2)
+    if "--prom" in args:
+        rest = args[args.index("--prom") + 1:]
+        text = metrics.prometheus(stats, int(oldest))
+        if rest and not rest[0].startswith("-"):
+            tmp = rest[0] + ".tmp"          # textfile collector: never expose a half-written file
+            with open(tmp, "w", encoding="utf-8") as f: f.write(text)
+            os.replace(tmp, rest[0])
+        else:
+            print(text, end="")
+        return 0
+    if out:
+        for cmd, st in sorted(stats.items()):
+            out.emit("stat", cmd=cmd, **st)
+        return 0
+    print(blue(f"{'command':<9} {'runs':>5} {'fail':>4} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} "
+               f"{'trend':>7} {'download':>9} {'cache':>6}  backends"))
+    for cmd, st in sorted(stats.items(), key=lambda kv: -kv[1]["runs"]):
+        b, a = st.get("p50_before"), st.get("p50_after")
+        trend = f"{(a - b) / b * 100:+6.0f}%" if a and b else "      -"
+        seen = st["hits"] + st["misses"]
+        cache = f"{st['hits'] / seen * 100:5.0f}%" if seen else "     -"
+        line = (f"{cmd:<9} {st['runs']:5d} {st['failures']:4d} " +
+                " ".join(f"{st[k]:6.0f}ms" for k in ("p50", "p90", "p99", "max")) +
+                f" {trend} {_human_bytes(st['bytes']):>9} {cache}  {','.join(st['backends'])}")
+        print(red(line) if st["failures"] * 2 > st["runs"] else line)
+    span = (now - oldest) / 86400
+    print(dim(f"({sum(s['runs'] for s in stats.values())} runs over {span:.1f} days; "
+              f"trend = p50 of the newer half vs the older half)"))
+    return 0
 
 def usage():
     ui_head()
     print("Commands:")
     print("  solar version")
-    print("  solar update")
-    print("  solar notes <app>                # view")
+    print("  solar update [--rollback] [--channel NAME] [--yes]")
+    print("  solar notes <app> [app…]         # view newest notes")
+    print("  solar notes <app> --before <n>   # older page (--limit N per page)")
     print('  solar notes <app> add ["text"]   # add community note')
     print('  solar devnote add <app> ["text"] # add developer note (needs SOLAR_DEV_TOKEN)')
     print("  solar sys")
     print("  solar search <query>")
-    print("  solar install <name>")
-    print("  solar remove <name>")
+    print("  solar list")
+    print("  solar install <name> [name…]")
+    print("  solar remove <name> [name…]")
+    print("  solar apply <manifest> [--dry-run]")
+    print("  solar logs [N] | --ship <url>     # recent log records / send to a collector")
+    print("  solar stats [--days N] [--prom [file]]  # timings, failures, cache hit rate")
+    print(dim("  --json / --ndjson anywhere: structured records on stdout, no prompts"))
+    print(dim("  --profile[=trace.json]: timed span tree on stderr, optional Chrome trace"))
 
 
+COMMANDS = {
+    "version": cmd_version, "-v": cmd_version, "--version": cmd_version,
+    "update":  cmd_update,
+    "notes":   cmd_notes,
+    "devnote": cmd_devnote,
+    "sys":     cmd_sys,
+    "search":  cmd_search,
+    "list":    cmd_list,
+    "install": cmd_install,
+    "remove":  cmd_remove,
+    "apply":   cmd_apply,
+    "logs":    cmd_logs,
+    "stats":   cmd_stats,
+}
+
+def _dispatch(cmd, name, args):
+    # one "command" record per run in the structured log (utils/logs.py)
+    # and one slot in the metrics ring (utils/metrics.py)
+    import time
+    from . import logs, metrics
+    logs.context(cmd=name)
+    t, code = time.time(), 1
+    try:
+        code = cmd(args)
+        return code
+    except Exception as e:
+        logs.error("command.crash", args=args, error=repr(e))
+        raise
+    finally:
+        ms = round((time.time() - t) * 1000, 1)
+        logs.log("warn" if code else "info", "command", args=args, code=code, ms=ms)
+        metrics.record(name, code, ms)
+
 def main(argv):
-    ensure_dirs()
-    if len(argv) <= 1:
-        usage(); return 0
-    cmd = argv[1]
-    if cmd in ("version","-v","--version"): return cmd_version()
-    if cmd == "update": return cmd_update()
-    if cmd == "notes":  return cmd_notes(argv[2:])
-    if cmd == "devnote": return cmd_devnote(argv[2:])
-    if cmd == "sys":     return cmd_sys()
-    if cmd == "search":  return cmd_search(argv[2:])
-    if cmd == "install": return cmd_install(argv[2:])
-    if cmd == "remove":  return cmd_remove(argv[2:])
-
-    usage(); return 1
+    global out
+    mode = next((a for a in argv[1:] if a in ("--json", "--ndjson")), None)
+    if mode:
+        from . import output
+        output.setup(mode[2:])
+        out, argv = output, [a for a in argv if a not in output.MODES]
+    prof = next((a for a in argv[1:] if a.split("=", 1)[0] == "--profile"), None)
+    if prof:
+        from . import trace
+        trace_path, argv = trace.setup(prof), [a for a in argv if a != prof]
+    try:
+        if len(argv) <= 1:
+            usage(); return 0
+        cmd = COMMANDS.get(argv[1])
+        if cmd is None:
+            usage(); return 1
+        if not prof: return _dispatch(cmd, argv[1], argv[2:])
+        with trace.span("solar " + " ".join(argv[1:]), "cmd"):
+            return _dispatch(cmd, argv[1], argv[2:])
+    finally:
+        if out: out.finish()
+        if prof: trace.finish(trace_path)
@@ -0,0 +1,157 @@
+import sys, queue, threading, subprocess
+from collections import namedtuple
+from .system import TIMEOUTS
+from .trace import span
+from . import metrics
+from .appid import canonical
+from .format import format_rows
+
+# One search hit, whichever backend (or the local index) it came from
+Pkg = namedtuple("Pkg", "name version arch summary backend remote")
+
+PAGE = 20          # rows per rendered page
+QUEUE_MAX = 256    # lines buffered between backend readers and the renderer
+
+SEARCH_CMDS = {
+    "dnf":     lambda q: ["dnf5", "search", q],
+    "flatpak": lambda q: ["flatpak", "search",
+                          "--columns=application,version,branch,remotes,name,description", q],
+}
+
+# ---------- parsers (iterable of lines -> Pkg) ----------
+_DNF_NOISE = ("Updating", "Repositories", "Matched", "Last metadata", "No matches")
+
+def parse_dnf(lines):
+    for line in lines:
+        if not line[:1].isspace() or not line.strip() or line.lstrip().startswith(_DNF_NOISE):
+            continue
+        head, _, summary = line.strip().replace(" : ", "\t", 1).partition("\t")
+        if not summary:
+            head, _, summary = head.partition(" ")
+        head = head.rstrip(":")
+        name, _, arch = head.rpartition(".")
+        if not name: name, arch = head, ""
+        yield Pkg(name, "", arch, summary.strip(), "dnf", "")
+
+def parse_flatpak(lines):
+    for line in lines:
+        cols = line.rstrip("\n").split("\t")
+        if len(cols) < 4 or "." not in cols[0]:
+            continue    # header or a row we don't understand
+        cols += [""] * (6 - len(cols))
+        app, ver, branch, remotes, title, desc = cols[:6]
+        summary = " — ".join(c.strip() for c in (title, desc) if c.strip())
+        yield Pkg(app.strip(), ver.strip(), "", summary, "flatpak", remotes.split(",")[0].strip())
+
+PARSERS = {"dnf": parse_dnf, "flatpak": parse_flatpak}
+
+# ---------- ranking / de-dup ----------
+def app_key(p):
+    # short name for ranking: a query for "firefox" is an exact hit on org.mozilla.firefox
+    n = p.name.lower()
+    return n.rsplit(".", 1)[-1] if p.backend == "flatpak" else n
+
+def rank(p, query):
+    q, n = query.strip().lower(), p.name.lower()
+    k = app_key(p)
+    if q in (n, k):                         return 0
+    if n.startswith(q) or k.startswith(q):  return 1
+    if q in n:                              return 2
+    if all(t in p.summary.lower() for t in q.split()): return 3
+    return 4
+
+def dedupe(results):
+    """
+    Drop repeats of one (backend, name, arch). Hits from different backends
+    only merge when appid says they are one app (an alias or the same name);
+    org.gnome.Maps and a dnf `maps` are not.
+    """
+    seen, apps = set(), {}
+    for p in results:
+        k = (p.backend, p.name, p.arch)
+        if k in seen: continue
+        seen.add(k)
+        if apps.setdefault(canonical(p.name), p.backend) != p.backend: continue
+        yield p
+
+# ---------- streaming ----------
+def _pump(backend, args, q, procs):
+    try:
+        with span(" ".join(args), "proc"):
+            _stream(backend, args, q, procs)
+    finally:
+        q.put((backend, None))      # after the span closes, so --profile sees it
+
+def _stream(backend, args, q, procs):
+    metrics.backend(args)
+    try:
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                text=True, encoding="utf-8", errors="replace")
+    except Exception:
+        return
+    procs.append(proc)
+    timer = threading.Timer(TIMEOUTS.get(backend, 60), proc.kill)
+    timer.daemon = True
+    timer.start()
+    try:
+        for p in PARSERS[backend](proc.stdout):
+            q.put((backend, p))
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+        proc.wait()
+
+def stream_search(query, backends):
+    """
+    Run every backend's search at once and yield Pkg records as lines arrive.
+    The queue is bounded, so a slow renderer throttles the readers.
+    """
+    backends = [b for b in backends if b in SEARCH_CMDS]
+    q, procs = queue.Queue(QUEUE_MAX), []
+    for b in backends:
+        threading.Thread(target=_pump, args=(b, SEARCH_CMDS[b](query), q, procs), daemon=True).start()
+    live = len(backends)
+    try:
+        while live:
+            _, p = q.get()
+            if p is None: live -= 1
+            else: yield p
+    finally:
+        for proc in procs:
+            if proc.poll() is None: proc.kill()
+
+# ---------- rendering ----------
+def _rows(page):
+    return [{"name": p.name, "desc": p.summary,
+             "tag": f"[{p.backend}{':' + p.remote if p.remote else ''}]"} for p in page]
+
+def _more():
+    try:
+        ans = input("-- more (Enter, q to stop) -- ").strip().lower()
+    except EOFError:
+        return False
+    return ans not in ("q", "quit", "n")
+
+def render(results, query, page=PAGE):
+    """
+    Print de-duplicated results a page at a time, each page ranked by match
+    quality. Pages go out as soon as they fill up. Returns rows shown.
+    """
+    interactive = sys.stdin.isatty() and sys.stdout.isatty()
+    buf, shown = [], 0
+    it = dedupe(results)
+    try:
+        for p in it:
+            buf.append(p)
+            if len(buf) < page: continue
+            buf.sort(key=lambda x: rank(x, query))
+            for ln in format_rows(_rows(buf)): print(ln)
+            sys.stdout.flush()
+            shown += len(buf); buf = []
+            if interactive and not _more(): return shown
+        buf.sort(key=lambda x: rank(x, query))
+        for ln in format_rows(_rows(buf)): print(ln)
+        return shown + len(buf)
+    finally:
+        it.close()
+        if hasattr(results, "close"): results.close()
@@ -1,42 +1,78 @@
-import os, json, time, shutil, tempfile, zipfile
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+import os, sys, json, time
+# subprocess, urllib.*, shutil, hashlib, tempfile and zipfile are imported
+# where they're used: together they cost more than most commands.
 
-from .. import API_BASE, __version__, GITHUB_OWNER, GITHUB_REPO, asset_name
+from .. import API_BASE, __version__, GITHUB_BASE, GITHUB_OWNER, GITHUB_REPO, PAGES_BASE, INDEX_URL, asset_name
+from .trace import traced
+from . import logs, metrics
 
 # Paths (per-user)
 INSTALL_DIR = os.path.expanduser("~/.local/share/solarneo")
-PKG_DIR     = os.path.join(INSTALL_DIR, "solarneo")
-BACKUP_DIR  = os.path.join(INSTALL_DIR, ".backup")
+PKG_DIR     = os.path.join(INSTALL_DIR, "solarneo")    # -> current/solarneo
+SLOTS_DIR   = os.path.join(INSTALL_DIR, "slots")       # one unpacked release per slot
+CURRENT     = os.path.join(INSTALL_DIR, "current")     # -> slots/<slot>
+PREVIOUS    = os.path.join(INSTALL_DIR, "previous")    # -> slots/<slot>, for --rollback
 CFG_DIR     = os.path.expanduser("~/.config/solarneo")
 CACHE_DIR   = os.path.expanduser("~/.cache/solarneo")
 
 UA = {"User-Agent": f"solarneo/{__version__}"}
 
-def ensure_dirs():
-    for d in (INSTALL_DIR, PKG_DIR, BACKUP_DIR, CFG_DIR, CACHE_DIR):
-        os.makedirs(d, exist_ok=True)
-
 # ========== Solar Neo Install Backend (restored v0.6 logic + upgrades) ==========
 
-import shutil, subprocess, time, sys
-from urllib.request import urlopen
-
-def have(bin_name): return shutil.which(bin_name) is not None
-
-def run_cmd(args):
-    try: return subprocess.run(args).returncode
-    except: return 1
-
-def capture_cmd(args):
+def have(bin_name):
+    # backend tools come from the persisted capability cache (utils/caps.py)
+    from .caps import TOOLS, which
+    import shutil
+    return (which(bin_name) if bin_name in TOOLS else shutil.which(bin_name)) is not None
+
+# per-backend ceilings for read-only queries (seconds); metadata loads can be slow
+TIMEOUTS = {"dnf": 120, "flatpak": 60, "rpm-ostree": 30}
+
+@traced("proc", lambda args, timeout=None: " ".join(args))
+def run_cmd(args, timeout=None):
+    import subprocess
+    metrics.backend(args)
+    t = time.time()
+    try: rc = subprocess.run(args, timeout=timeout).returncode
+    except subprocess.TimeoutExpired: rc = 124
+    except: rc = 1
+    logs.log("warn" if rc else "debug", "proc", args=args, rc=rc, ms=_ms(t))
+    return rc
+
+@traced("proc", lambda args, timeout=None: " ".join(args))
+def capture_cmd(args, timeout=None):
+    import subprocess
+    metrics.backend(args)
+    t = time.time()
     try:
-        out = subprocess.check_output(args, stderr=subprocess.STDOUT)
-        return 0, out.decode("utf-8", "replace")
+        rc, out = 0, subprocess.check_output(args, stderr=subprocess.STDOUT, timeout=timeout)
     except subprocess.CalledProcessError as e:
-        return e.returncode, e.output.decode("utf-8", "replace")
+        rc, out = e.returncode, e.output
+    except subprocess.TimeoutExpired as e:
+        rc, out = 124, e.output or b""
     except Exception as e:
-        return 1, str(e)
+        rc, out = 1, str(e).encode("utf-8")
+    logs.debug("proc", args=args, rc=rc, ms=_ms(t))      # non-zero is often an answer here (rpm -q)
+    return rc, out.decode("utf-8", "replace")
+
+def _ms(t):
+    return round((time.time() - t) * 1000, 1)
+
+MAX_PARALLEL = 8                     # backend processes capture_many runs at once
+
+@traced("proc", lambda jobs: "parallel: " + ", ".join(b for b, _ in jobs))
+def capture_many(jobs):
+    """
+    Run capture_cmd() for several backends at once.
+    jobs: [(backend, args)] -> [(backend, code, out)] in the order given,
+    so merged output doesn't depend on which backend answers first.
+    """
+    if len(jobs) < 2:
+        return [(b, *capture_cmd(a, TIMEOUTS.get(b))) for b, a in jobs]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(len(jobs), MAX_PARALLEL)) as ex:
+        futs = [(b, ex.submit(capture_cmd, a, TIMEOUTS.get(b))) for b, a in jobs]
+        return [(b, *f.result()) for b, f in futs]
 
 def detect_backends():
     backs = []
@@ -44,10 +80,11 @@ def detect_backends():
     if have("flatpak"): backs.append("flatpak")
     return backs
 
-def progress_bar(current, total, start_time):
+def progress_bar(current, total, start_time, base=0):
+    # base: bytes already on disk before this run (resumed downloads)
     percent = (current / total) * 100
     elapsed = time.time() - start_time
-    speed = current / (elapsed+0.1)
+    speed = (current - base) / (elapsed+0.1)
     eta = (total - current) / (speed+0.1)
     bar_len = 20
     filled = int(bar_len * percent/100)
@@ -55,133 +92,598 @@ def progress_bar(current, total, start_time):
     sys.stdout.write(f"\r[{bar}] {percent:4.1f}% | {speed/1e6:5.1f} MB/s | eta {eta:4.1f}s ")
     sys.stdout.flush()
 
-def flatpak_install(id):
+def flatpak_install(ids):
     print("⮞ Installing via flatpak…")
-    args = ["flatpak","install","-y","flathub",id] if "." not in id else ["flatpak","install","-y",id]
-    return run_cmd(["sudo"]+args)
+    from .caps import has_remote
+    remote = ["flathub"] if any("." not in i for i in ids) and has_remote("flathub") else []
+    return run_cmd(["sudo","flatpak","install","-y"] + remote + list(ids))
 
-def flatpak_remove(id):
+def flatpak_remove(ids):
     print("⮞ Removing via flatpak…")
-    if "." not in id: return 1
-    return run_cmd(["sudo","flatpak","uninstall","-y",id])
+    ids = [i for i in ids if "." in i]
+    if not ids: return 1
+    return run_cmd(["sudo","flatpak","uninstall","-y"] + ids)
 
-def dnf_install(name):
+def dnf_install(names):
     print("⮞ Installing via dnf…")
-    return run_cmd(["sudo","dnf5","install","-y",name])
+    # unknown names are skipped instead of failing the whole transaction
+    return run_cmd(["sudo","dnf5","install","-y","--skip-unavailable"] + list(names))
 
-def dnf_remove(name):
+def dnf_remove(names):
     print("⮞ Removing via dnf…")
-    return run_cmd(["sudo","dnf5","remove","-y",name])
+    return run_cmd(["sudo","dnf5","remove","-y"] + list(names))
 
-def install_pkg(name):
-    print(f"⮞ Resolving {name}…")
-    backs = detect_backends()
-    if not backs: return False,"No backend available"
+INSTALLERS = {"dnf": dnf_install, "flatpak": flatpak_install}
+REMOVERS   = {"dnf": dnf_remove,  "flatpak": flatpak_remove}
 
-    if have("dnf5"):
-        rc = dnf_install(name)
-        return (rc == 0), "dnf install failed" if rc else "ok"
+def looks_like_app_id(name):
+    # Flatpak app ids are reverse-DNS: com.obsproject.Studio
+    return name.count(".") >= 2 and name[:1].isalpha()
 
-    if have("flatpak"):
-        rc = flatpak_install(name)
-        return (rc == 0), "flatpak install failed" if rc else "ok"
+def pick_backend(name):
+    backs = detect_backends()
+    if "flatpak" in backs and looks_like_app_id(name): return "flatpak"
+    return backs[0] if backs else None
+
+def installed_names(backends):
+    """One snapshot of installed names per backend: {backend: set()}."""
+    jobs = []
+    if "dnf" in backends:
+        jobs.append(("dnf", ["rpm","-qa","--qf","%{NAME}\\n"] if have("rpm")
+                            else ["dnf5","list","--installed"]))
+    if "flatpak" in backends:
+        jobs.append(("flatpak", ["flatpak","list","--columns=application"]))
+    snap = {}
+    for b, code, out in capture_many(jobs):
+        names = set()
+        for ln in (out.splitlines() if code == 0 else []):
+            ln = ln.strip()
+            if not ln or ln.startswith(("Installed", "Application")): continue
+            name = ln.split()[0]
+            if b == "dnf" and " " in ln:   # dnf5 list: name.arch  version  repo
+                name = name.rpartition(".")[0] or name
+            names.add(name)
+        snap[b] = names
+    return snap
+
+def is_installed(backend, name, snap):
+    if name in snap.get(backend, ()): return True
+    # dnf also accepts provides (e.g. `vim` -> vim-enhanced)
+    return backend == "dnf" and have("rpm") and capture_cmd(["rpm","-q","--whatprovides",name])[0] == 0
+
+def _transact(names, table, verb, want_installed):
+    from .resolve import resolve_many, forget
+    backs = detect_backends()
+    # removes resolve against what is actually installed
+    where = resolve_many(names, None if want_installed else installed_names(backs))
+    plan = {}
+    for n in names:
+        b, target = where[n]
+        if b: plan.setdefault(b, []).append(target)
+    rcs = {b: table[b](group) for b, group in plan.items()}
+    snap = installed_names(list(rcs))
+    res = []
+    for n in names:
+        b, target = where[n]
+        if b is None:
+            res.append((n, False, "No backend available")); continue
+        if b == "flatpak" and "." not in target:
+            ok = rcs[b] == 0      # bare name: flatpak resolved it, can't check the id
+        else:
+            ok = is_installed(b, target, snap) == want_installed
+        if not ok: forget(n)
+        label = n if target == n else f"{n} ({target})"
+        res.append((label, ok, "ok" if ok else f"{b} {verb} failed"))
+    return res
+
+def install_pkgs(names):
+    """Install many names with one transaction per backend: [(name, ok, msg)]."""
+    print(f"⮞ Resolving {', '.join(names)}…")
+    return _transact(names, INSTALLERS, "install", True)
+
+def remove_pkgs(names):
+    """Remove many names with one transaction per backend: [(name, ok, msg)]."""
+    return _transact(names, REMOVERS, "remove", False)
 
-    return False,"unknown backend fail"
+def install_pkg(name):
+    _, ok, msg = install_pkgs([name])[0]
+    return ok, msg
 
 def remove_pkg(name):
+    _, ok, msg = remove_pkgs([name])[0]
+    return ok, msg
+
+def search_pkgs(query, on_result=None):
+    """
+    Search every backend and page the results to the terminal, or hand each
+    Pkg to on_result as it arrives instead. True when anything matched.
+    """
+    from .index import search_index, refresh_index
+    from .search import stream_search, render, dedupe
+    def emit(res, q):               # same rows the renderer would show, unpaged
+        return sum(on_result(p) or 1 for p in dedupe(res))
+    show = render if on_result is None else emit
     backs = detect_backends()
-    if not backs: return False,"No backend available"
-
-    if have("dnf5"):
-        rc = dnf_remove(name)
-        return (rc == 0), "dnf remove failed" if rc else "ok"
-
-    if have("flatpak"):
-        rc = flatpak_remove(name)
-        return (rc == 0), "flatpak remove failed" if rc else "ok"
-
-    return False,"unknown backend fail"
-
-def search_pkgs(query):
-    shown = False
-    if have("dnf5"):
-        code,out = capture_cmd(["dnf5","search",query])
-        if code == 0 and out.strip():
-            print(out); shown = True
-    if have("flatpak"):
-        code,out = capture_cmd(["flatpak","search",query])
-        if code == 0 and out.strip():
-            print(out); shown = True
+    hits, stale = search_index(query, backs)
+    if not stale:
+        return show(hits, query) > 0
+
+    # some shards missing/stale: index hits first, stream only those backends, then refresh them
+    def merged():
+        yield from hits
+        yield from stream_search(query, stale)
+    shown = show(merged(), query) > 0
+    print("⮞ updating search index…")
+    refresh_index(stale)
     return shown
 
+def list_pkgs():
+    """Installed packages per backend, queried concurrently: [(backend, code, out)]."""
+    jobs = []
+    if have("rpm-ostree"): jobs.append(("rpm-ostree", ["rpm-ostree","status"]))
+    if have("dnf5"):       jobs.append(("dnf", ["dnf5","list","--installed"]))
+    if have("flatpak"):    jobs.append(("flatpak", ["flatpak","list"]))
+    return capture_many(jobs)
+
 
 # ---------- http helpers ----------
-def http_json(url, data=None, headers=None, timeout=25):
-    hdrs = {}
-    hdrs.update(UA)
+# one keep-alive connection per host, reused by every API call in this process;
+# http(s)_proxy / no_proxy are honoured like urlopen does
+_pool = {}
+IDEMPOTENT = ("GET", "HEAD")
+
+def _proxy(scheme, host):
+    """(proxy host:port, Proxy-Authorization value or None) for scheme://host, or None."""
+    from urllib.request import getproxies, proxy_bypass
+    from urllib.parse import urlsplit, unquote
+    p = getproxies().get(scheme)
+    if not p or proxy_bypass(host): return None
+    u = urlsplit(p if "://" in p else "http://" + p)
+    auth = None
+    if u.username:
+        import base64
+        cred = f"{unquote(u.username)}:{unquote(u.password or '')}".encode("utf-8")
+        auth = "Basic " + base64.b64encode(cred).decode("ascii")
+    return u.hostname + (f":{u.port}" if u.port else ""), auth
+
+def _conn(scheme, host, timeout):
+    """(connection, proxy) for scheme://host; proxy is _proxy()'s answer for plain http, else None."""
+    import http.client
+    key = (scheme, host)
+    if key not in _pool:
+        proxy = _proxy(scheme, host)
+        if proxy is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            _pool[key] = cls(host, timeout=timeout), None
+        elif scheme == "https":             # CONNECT through the proxy, TLS end to end
+            c = http.client.HTTPSConnection(proxy[0], timeout=timeout)
+            c.set_tunnel(host, headers={"Proxy-Authorization": proxy[1]} if proxy[1] else None)
+            _pool[key] = c, None
+        else:                               # plain http: absolute URLs to the proxy
+            _pool[key] = http.client.HTTPConnection(proxy[0], timeout=timeout), proxy
+    c, proxy = _pool[key]
+    c.timeout = timeout
+    if c.sock is not None: c.sock.settimeout(timeout)
+    return c, proxy
+
+@traced("http", lambda method, url, *a, **k: f"{method} {url}")
+def http_request(method, url, body=None, headers=None, timeout=25):
+    """Request over the pooled connection: (status, headers, body bytes)."""
+    import http.client
+    from urllib.parse import urlsplit
+    u = urlsplit(url)
+    path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    hdrs = dict(UA)
     if headers: hdrs.update(headers)
-    req = Request(url, data=data, headers=hdrs)
-    with urlopen(req, timeout=timeout) as r:
-        b = r.read()
+    for attempt in (0, 1):
+        c, proxy = _conn(u.scheme, u.netloc, timeout)
+        if proxy and proxy[1]: hdrs["Proxy-Authorization"] = proxy[1]
+        try:
+            c.request(method, url if proxy else path, body=body, headers=hdrs)
+            r = c.getresponse()
+            b = r.read()
+            metrics.downloaded(len(b))
+            return r.status, r.headers, b
+        except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                BrokenPipeError, ConnectionResetError) as e:
+            c.close()                 # server dropped the idle connection: redial once
+            _pool.pop((u.scheme, u.netloc), None)
+            # a POST may have reached the server before the drop; only resend what is safe to repeat
+            if attempt or (method not in IDEMPOTENT and not isinstance(e, http.client.CannotSendRequest)):
+                raise
+        except Exception:
+            c.close()
+            _pool.pop((u.scheme, u.netloc), None)
+            raise
+
+def http_json(url, data=None, headers=None, timeout=25):
+    status, hdrs, b = http_request("POST" if data is not None else "GET", url, data, headers, timeout)
+    if status >= 400:
+        from urllib.error import HTTPError
+        raise HTTPError(url, status, f"HTTP {status}", hdrs, None)
     try:
         return json.loads(b.decode("utf-8"))
     except Exception:
         return None
 
-def api_get(params):
-    return http_json(f"{API_BASE}?{urlencode(params)}")
+def api_url(params):
+    from urllib.parse import urlencode
+    return f"{API_BASE}?{urlencode(params)}"
 
-def api_post(params, obj):
+def api_get(params, timeout=25):
+    return http_json(api_url(params), timeout=timeout)
+
+def api_post(params, obj, timeout=25):
     data = json.dumps(obj).encode("utf-8")
-    return http_json(f"{API_BASE}?{urlencode(params)}",
-                     data=data, headers={"Content-Type":"application/json"})
+    return http_json(api_url(params),
+                     data=data, headers={"Content-Type":"application/json"}, timeout=timeout)
 
 # ---------- notes ----------
-def get_notes(app):
-    # API auto-creates on first access
-    j = api_get({"cmd":"notes", "app":app})
-    if not j: return {"community":[], "developer":[]}
-    return {"community": j.get("community",[]) or [],
-            "developer": j.get("developer",[]) or []}
+# served from the local store in utils/notes.py; the API is only asked for
+# notes newer than the ones we hold, and offline posts wait in an outbox
+def get_notes(app, limit=None, before=None):
+    """One page of notes, newest first page by default; pass the returned 'before' for older ones."""
+    from .notes import get, PAGE
+    return get(app, limit=limit or PAGE, before=before)
+
+def get_notes_bulk(apps):
+    """Notes for many apps: {app: notes}, with one API round trip for the stale ones."""
+    from .notes import get_many
+    return get_many(apps)
 
 def add_note(app, text):
-    r = api_post({"cmd":"note_add"}, {"app":app, "text":text})
-    return bool(r and r.get("ok"))
+    from .notes import post
+    return post("note_add", {"app":app, "text":text})
 
 def add_dev_note(app, text, token):
-    r = api_post({"cmd":"note_add_dev"}, {"app":app, "text":text, "token":token})
-    return bool(r and r.get("ok"))
+    from .notes import post
+    return post("note_add_dev", {"app":app, "text":text, "token":token})
 
 # ---------- version / update ----------
-def latest_version():
-    j = api_get({"cmd":"version"})
-    if not j or "latest_version" not in j:
+VERSION_CACHE   = os.path.join(CACHE_DIR, "version.json")
+VERSION_TTL     = 6 * 3600
+VERSION_TIMEOUT = 5
+REFRESH_LOCK    = VERSION_CACHE + ".lock"
+
+def _load_version_cache():
+    try:
+        with open(VERSION_CACHE, "r", encoding="utf-8") as f: return json.load(f)
+    except Exception:
+        return {}
+
+@traced("http", lambda: "version check")
+def refresh_latest():
+    """Revalidate the cached version answer with a conditional request."""
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+    c = _load_version_cache()
+    hdrs = dict(UA)
+    if c.get("etag"): hdrs["If-None-Match"] = c["etag"]
+    if c.get("last_modified"): hdrs["If-Modified-Since"] = c["last_modified"]
+    try:
+        with urlopen(Request(api_url({"cmd": "version"}), headers=hdrs),
+                     timeout=VERSION_TIMEOUT) as r:
+            raw = r.read()
+            metrics.downloaded(len(raw))
+            j = json.loads(raw.decode("utf-8"))
+            if not j or "latest_version" not in j: return c.get("latest")
+            c.update(latest=j["latest_version"], etag=r.headers.get("ETag"),
+                     last_modified=r.headers.get("Last-Modified"))
+    except HTTPError as e:
+        if e.code != 304:                               # 304: cached answer still good
+            logs.warn("version.check_failed", error=str(e))
+            return c.get("latest")
+    except Exception as e:
+        logs.warn("version.check_failed", error=str(e))
+        return c.get("latest")
+    c["checked"] = time.time()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(VERSION_CACHE + ".tmp", "w", encoding="utf-8") as f: json.dump(c, f)
+    os.replace(VERSION_CACHE + ".tmp", VERSION_CACHE)
+    return c.get("latest")
+
+def _refresh_in_background():
+    # one detached refresher at a time; a stale lock (crashed refresher) expires
+    try:
+        if time.time() - os.path.getmtime(REFRESH_LOCK) < 60: return
+        os.remove(REFRESH_LOCK)
+    except OSError:
+        pass
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        os.close(os.open(REFRESH_LOCK, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except OSError:
+        return
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    import subprocess
+    code = ("import os\nfrom solarneo.utils.system import refresh_latest, REFRESH_LOCK\n"
+            "try: refresh_latest()\nfinally: os.remove(REFRESH_LOCK)")
+    try:
+        subprocess.Popen([sys.executable, "-c", code], env=env, start_new_session=True,
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        os.remove(REFRESH_LOCK)
+
+def latest_version(max_age=VERSION_TTL, background=False):
+    """
+    Latest published version, answered from CACHE_DIR when younger than
+    max_age. With background=True a stale answer is returned right away
+    and revalidated by a detached process for next time.
+    """
+    c = _load_version_cache()
+    fresh = c.get("latest") and time.time() - c.get("checked", 0) < max_age
+    metrics.cache(bool(fresh or (background and c.get("latest"))))
+    if fresh:
+        return c["latest"]
+    if background and c.get("latest"):
+        _refresh_in_background()
+        return c["latest"]
+    return refresh_latest()
+
+DL_DIR = os.path.join(CACHE_DIR, "downloads")
+# verified release archives, named by sha256; point several accounts at one dir to share.
+# Files another account put there are used but never touched: when the shared
+# dir can't take ours, they go to the private one.
+PRIVATE_ARCHIVE_DIR = os.path.join(CACHE_DIR, "archives")
+ARCHIVE_DIR  = os.environ.get("SOLAR_ARCHIVE_DIR") or PRIVATE_ARCHIVE_DIR
+ARCHIVE_KEEP = 5
+INDEX_CACHE  = os.path.join(CACHE_DIR, "Version_Index.json")
+CHUNK  = 64 * 1024
+DL_TRIES = 3
+
+@traced("http", lambda url, offset=0: f"GET {url}" + (f" from {offset}" if offset else ""))
+def _http_get(url, offset=0):
+    """Open a streaming response, asking for bytes from `offset` on."""
+    from urllib.request import Request, urlopen
+    hdrs = dict(UA)
+    if offset: hdrs["Range"] = f"bytes={offset}-"
+    return urlopen(Request(url, headers=hdrs), timeout=60)
+
+def _total_size(r, offset):
+    cr = r.headers.get("Content-Range", "")          # bytes 100-999/1000
+    if r.status == 206 and "/" in cr and not cr.endswith("*"):
+        return int(cr.rsplit("/", 1)[1])
+    n = r.headers.get("Content-Length")
+    return int(n) + (offset if r.status == 206 else 0) if n else 0
+
+def _hash_file(path, h=None):
+    import hashlib
+    h = h or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h
+
+def _download_once(url, part):
+    """One attempt; returns the sha256 object covering everything in `part`."""
+    import hashlib
+    from urllib.error import HTTPError
+    have = os.path.getsize(part) if os.path.exists(part) else 0
+    try:
+        r = _http_get(url, have)
+    except HTTPError as e:
+        if e.code == 416 and have: return _hash_file(part)   # nothing left to fetch
+        raise
+    h = hashlib.sha256()
+    with r:
+        if r.status != 206: have = 0              # range ignored: start over
+        elif have: _hash_file(part, h)
+        total = _total_size(r, have)
+        start, got = time.time(), have
+        try:
+            with open(part, "ab" if have else "wb") as f:
+                while True:
+                    chunk = r.read(CHUNK)
+                    if not chunk: break
+                    f.write(chunk)
+                    h.update(chunk)
+                    got += len(chunk)
+                    if total: progress_bar(got, total, start, have)
+        finally:
+            if total: sys.stdout.write("\n")
+            metrics.downloaded(got - have)
+    if total and got < total:
+        raise IOError(f"connection dropped at {got}/{total} bytes")
+    return h
+
+@traced("http", lambda url, name, sha256=None: f"download {name}")
+def _download(url, name, sha256=None):
+    """
+    Stream url into DL_DIR/name with constant memory. Partial data is kept
+    in name.part and resumed with a Range request, also across runs.
+    With sha256 the data is hashed as it streams, a mismatch is refused and
+    the verified file lands in ARCHIVE_DIR/<sha256>.zip.
+    """
+    import shutil
+    from urllib.error import HTTPError
+    os.makedirs(DL_DIR, exist_ok=True)
+    dest = os.path.join(DL_DIR, name)
+    part = dest + ".part"
+    for attempt in range(DL_TRIES):
+        try:
+            h = _download_once(url, part)
+            break
+        except HTTPError as e:
+            if e.code < 500 or attempt == DL_TRIES - 1: raise
+            logs.warn("download.retry", url=url, attempt=attempt + 1, error=str(e))
+            time.sleep(1 + attempt)
+        except OSError as e:
+            if attempt == DL_TRIES - 1: raise
+            logs.warn("download.retry", url=url, attempt=attempt + 1, error=str(e))
+            time.sleep(1 + attempt)
+    if sha256:
+        if h.hexdigest() != sha256.lower():
+            os.remove(part)
+            logs.error("download.sha256_mismatch", url=url, expected=sha256, got=h.hexdigest())
+            raise IOError(f"sha256 mismatch (expected {sha256}, got {h.hexdigest()})")
+        for d in _archive_dirs():
+            dest = os.path.join(d, sha256.lower() + ".zip")
+            try:
+                os.makedirs(d, exist_ok=True)
+                shutil.move(part, dest)
+                return dest
+            except OSError as e:
+                if d == PRIVATE_ARCHIVE_DIR: raise
+                logs.warn("archive.shared_unwritable", dir=d, error=str(e))
+    os.replace(part, dest)
+    return dest
+
+def _archive_dirs():
+    return list(dict.fromkeys((ARCHIVE_DIR, PRIVATE_ARCHIVE_DIR)))
+
+@traced("fs", lambda sha256: f"verify cached {sha256[:12]}")
+def cached_archive(sha256):
+    """Path of a verified archive with this digest, if we already have one (shared dir first)."""
+    for d in _archive_dirs():
+        path = os.path.join(d, sha256.lower() + ".zip")
+        if not os.path.isfile(path): continue
+        if _hash_file(path).hexdigest() != sha256.lower():
+            try: os.remove(path)      # corrupted on disk: fetch again
+            except OSError: pass      # someone else's: leave it to them
+            continue
+        try: os.utime(path)           # keep recently used archives on prune
+        except OSError: pass
+        metrics.cache(True)
+        return path
+    metrics.cache(False)
+    return None
+
+def prune_archives(keep=ARCHIVE_KEEP):
+    """Keep the `keep` newest of our own archives per dir; other accounts' files are theirs to prune."""
+    uid = os.getuid()
+    for d in _archive_dirs():
+        try:
+            zips = sorted((e for e in os.scandir(d) if e.name.endswith(".zip") and e.stat().st_uid == uid),
+                          key=lambda e: e.stat().st_mtime, reverse=True)
+        except OSError:
+            continue
+        for e in zips[keep:]:
+            try: os.remove(e.path)
+            except OSError: pass
+
+# ---------- release index ----------
+def release_index():
+    """Version_Index.json, refreshed from the site when reachable, else the last copy."""
+    try:
+        j = http_json(INDEX_URL)
+        if j and isinstance(j.get("versions"), list):
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(INDEX_CACHE + ".tmp", "w", encoding="utf-8") as f: json.dump(j, f)
+            os.replace(INDEX_CACHE + ".tmp", INDEX_CACHE)
+            return j
+    except Exception:
+        pass
+    try:
+        with open(INDEX_CACHE, "r", encoding="utf-8") as f: return json.load(f)
+    except Exception:
         return None
-    return j["latest_version"]
 
-def _http_get(url):
-    req = Request(url, headers=UA)
-    with urlopen(req, timeout=60) as r:
-        return r.read()
+def release_entry(tag, index=None):
+    from .version import find
+    return find(index if index is not None else release_index(), tag)
+
+def latest_release(channel=None, index=None):
+    """Tag of the newest release on channel (SOLAR_CHANNEL, default stable) per the index, or None."""
+    from .version import newest, tag, CHANNEL
+    e = newest(index if index is not None else release_index(),
+               channel or os.environ.get("SOLAR_CHANNEL") or CHANNEL)
+    return tag(e) if e else None
 
-def _save_bytes(path, data):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "wb") as f: f.write(data)
+def _release_zip(entry):
+    files = entry.get("files") or []
+    f = next((f for f in files if f.get("name", "").lower() == "release.zip"), files[0] if files else None)
+    return f"{PAGES_BASE}/Versions/{f['path']}" if f else None
 
+@traced("fs", lambda src_zip, dest_dir: f"unzip {os.path.basename(src_zip)}")
 def _unzip_to(src_zip, dest_dir):
+    import zipfile
     with zipfile.ZipFile(src_zip, "r") as z:
         z.extractall(dest_dir)
 
-def _backup_current():
-    slot = os.path.join(BACKUP_DIR, time.strftime("%Y%m%d-%H%M%S"))
-    os.makedirs(slot, exist_ok=True)
-    if os.path.isdir(PKG_DIR):
-        shutil.copytree(PKG_DIR, os.path.join(slot, "solarneo"))
-    return slot
-
-def _replace_from(unpacked_root):
+# ---------- install slots ----------
+KEEP_SLOTS = 3                       # current + previous + one spare
+SLOTS_MAX_BYTES = 64 * 1024 * 1024
+
+def _link(target, path):
+    # build the new link beside the old one, then rename over it (atomic)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp): os.remove(tmp)
+    os.symlink(target, tmp)
+    os.replace(tmp, path)
+
+def _slot_of(link):
+    return os.path.basename(os.readlink(link)) if os.path.islink(link) else None
+
+def _new_slot(label):
+    """Create an empty, uniquely named slot: (name, path). Same label twice a second is fine."""
+    import tempfile
+    os.makedirs(SLOTS_DIR, exist_ok=True)
+    path = tempfile.mkdtemp(prefix=f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-", dir=SLOTS_DIR)
+    os.chmod(path, 0o755)             # mkdtemp makes it 0700
+    return os.path.basename(path), path
+
+def _adopt_legacy():
+    """Move a pre-slot install (real PKG_DIR) into a slot; a rename, not a copy."""
+    if os.path.islink(PKG_DIR) or not os.path.isdir(PKG_DIR):
+        return
+    _, slot = _new_slot("legacy")
+    old_v = os.path.join(INSTALL_DIR, "version.txt")
+    if os.path.isfile(old_v): os.rename(old_v, os.path.join(slot, "version.txt"))
+    os.rename(PKG_DIR, os.path.join(slot, "solarneo"))
+    _link(os.path.join("slots", os.path.basename(slot)), CURRENT)
+    _link(os.path.join("current", "solarneo"), PKG_DIR)
+
+def _activate(slot):
+    prev = _slot_of(CURRENT)
+    _link(os.path.join("slots", slot), CURRENT)
+    if prev and prev != slot:
+        _link(os.path.join("slots", prev), PREVIOUS)
+    if not os.path.islink(PKG_DIR):
+        _link(os.path.join("current", "solarneo"), PKG_DIR)
+
+def _du(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try: total += os.lstat(os.path.join(root, f)).st_size
+            except OSError: pass
+    return total
+
+def prune_slots(keep=KEEP_SLOTS, max_bytes=SLOTS_MAX_BYTES):
+    """Drop the oldest slots beyond `keep` or the size cap; never current/previous."""
+    import shutil
+    pinned = {_slot_of(CURRENT), _slot_of(PREVIOUS)}
+    try:
+        slots = sorted((e for e in os.scandir(SLOTS_DIR) if e.is_dir(follow_symlinks=False)
+                        and not e.name.startswith(".")),
+                       key=lambda e: e.stat().st_mtime, reverse=True)
+    except OSError:
+        return []
+    sizes = {e.name: _du(e.path) for e in slots}
+    used, dropped = sum(sizes.values()), []
+    for e in reversed(slots):
+        if e.name in pinned: continue
+        if len(slots) - len(dropped) <= keep and used <= max_bytes: break
+        shutil.rmtree(e.path, ignore_errors=True)
+        used -= sizes[e.name]; dropped.append(e.name)
+    return dropped
+
+def rollback():
+    """Point current back at the previous slot (and vice versa)."""
+    prev, cur = _slot_of(PREVIOUS), _slot_of(CURRENT)
+    if not prev or not os.path.isdir(os.path.join(SLOTS_DIR, prev)):
+        return False, "no previous install to roll back to"
+    _link(os.path.join("slots", prev), CURRENT)
+    if cur: _link(os.path.join("slots", cur), PREVIOUS)
+    logs.info("rollback", to=prev, previous=cur)
+    return True, prev
+
+@traced("fs", lambda unpacked_root, tag: f"install slot {tag}")
+def _replace_from(unpacked_root, tag):
     """
-    Copy unpacked_root/solarneo/* to PKG_DIR
+    Turn an unpacked release into slots/<tag>-<stamp> and switch to it.
+    The unpack dir must live under SLOTS_DIR so everything is a rename.
     Handles zips where root contains either `solarneo/` or just the files.
     """
     # Find folder containing 'solarneo'
@@ -192,43 +694,91 @@ def _replace_from(unpacked_root):
             break
 
     src = os.path.join(src_root, "solarneo")
-    if not os.path.isdir(src):
+    slot, dest = _new_slot(tag)
+    if os.path.isdir(src):
+        os.rename(src, os.path.join(dest, "solarneo"))
+    else:
         # fallback: maybe the root itself is the package
-        src = unpacked_root
-
-    if os.path.exists(PKG_DIR):
-        shutil.rmtree(PKG_DIR)
-    shutil.copytree(src, PKG_DIR)
+        os.rename(unpacked_root, os.path.join(dest, "solarneo"))
+    vsrc = os.path.join(src_root, "version.txt")
+    if os.path.isfile(vsrc):
+        os.rename(vsrc, os.path.join(dest, "version.txt"))
+    else:
+        with open(os.path.join(dest, "version.txt"), "w", encoding="utf-8") as f: f.write(tag + "\n")
+    if not os.path.isfile(os.path.join(dest, "solarneo", "__main__.py")):
+        # not a client build: never point `current` at it
+        import shutil
+        shutil.rmtree(dest, ignore_errors=True)
+        raise IOError("release has no solarneo/__main__.py")
+
+    _adopt_legacy()
+    _activate(slot)
+    return slot
 
+@traced("", lambda tag: f"update_to {tag}")
 def update_to(tag):
     """
     Download client-only release zip and install.
     Expected asset name: Solar-Neo_<tag>.zip
     """
+    import shutil, tempfile
     asset = asset_name(tag)      # e.g. Solar-Neo_v0.7.zip
-    url   = f"https://github.com/{GITHUB_OWNER}/{GITHUB_REPO}/releases/download/{tag}/{asset}"
-
-    with tempfile.TemporaryDirectory() as td:
-        zpath = os.path.join(td, "client.zip")
-        try:
-            data = _http_get(url)
-        except Exception as e:
-            return False, f"download failed: {e}"
-        _save_bytes(zpath, data)
+    url   = f"{GITHUB_BASE}/{GITHUB_OWNER}/{GITHUB_REPO}/releases/download/{tag}/{asset}"
+
+    # Only changed files when the index publishes a short enough delta chain
+    logs.info("update.start", tag=tag, current=installed_version())
+    index = release_index()
+    entry = release_entry(tag, index)
+    from .version import installable
+    if entry and not installable(entry):         # e.g. legacy 'Neo' builds: no solarneo package inside
+        logs.error("update.failed", tag=tag, stage="resolve", error="not a Solar Neo release")
+        return False, f"{tag} is not a Solar Neo release"
+    from .delta import delta_update
+    if delta_update(tag, entry, index):
+        prune_slots()
+        logs.info("update.done", tag=tag, source="delta")
+        return True, "ok (delta)"
+
+    def fail(stage, e):
+        logs.error("update.failed", tag=tag, stage=stage, error=str(e))
+        return False, f"{stage} failed: {e}"
+
+    # Prefer the archive Version_Index.json publishes a digest for
+    sha = (entry or {}).get("sha256")
+    verified = bool(sha and _release_zip(entry))
+    try:
+        zpath = cached_archive(sha) if verified else None
+        if zpath:
+            source = "cached"
+            print("⮞ using cached archive (sha256 verified)")
+        elif verified:
+            source = "download"
+            zpath = _download(_release_zip(entry), asset, sha256=sha)
+        else:
+            source = "unverified"
+            print("⮞ release not in Version_Index.json; installing unverified")
+            zpath = _download(url, asset)
+    except Exception as e:
+        return fail("download", e)
 
-        unpack = os.path.join(td, "unpack")
-        os.makedirs(unpack, exist_ok=True)
+    os.makedirs(SLOTS_DIR, exist_ok=True)
+    unpack = tempfile.mkdtemp(prefix=".unpack-", dir=SLOTS_DIR)
+    try:
         try:
             _unzip_to(zpath, unpack)
         except Exception as e:
-            return False, f"unzip failed: {e}"
-
-        _backup_current()
+            return fail("unzip", e)
         try:
-            _replace_from(unpack)
+            slot = _replace_from(unpack, tag)
         except Exception as e:
-            return False, f"install failed: {e}"
-
+            return fail("install", e)
+    finally:
+        shutil.rmtree(unpack, ignore_errors=True)
+
+    if verified: prune_archives()
+    else:        os.remove(zpath)
+    prune_slots()
+    logs.info("update.done", tag=tag, source=source, slot=slot)
     return True, "ok"
 
 def installed_version():
@@ -0,0 +1,131 @@
+import os, sys, time, json
+from _thread import get_ident
+
+# Timed spans for `solar --profile <cmd>`: subprocesses, HTTP and the heavy
+# filesystem steps of an update. Off by default; a wrapped call then costs
+# one global lookup. Spans opened on worker threads (capture_many, the
+# streaming search) hang under whatever the main thread had open.
+# `--profile=trace.json` also writes the spans as a Chrome trace.
+
+ON = False
+_t0 = 0.0
+_main = get_ident()
+_stacks = {}                # thread id -> open spans
+_done = []
+
+class Span:
+    __slots__ = ("name", "cat", "args", "start", "end", "tid", "parent", "kids")
+
+    def __init__(self, name, cat, args):
+        self.name, self.cat, self.args, self.kids = name, cat, args, []
+
+    def __enter__(self):
+        self.tid = get_ident()
+        stack = _stacks.setdefault(self.tid, [])
+        top = stack or _stacks.get(_main) or [None]
+        self.parent = top[-1]
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.end = time.perf_counter()
+        if exc[0] is not None: self.args["error"] = exc[0].__name__
+        _stacks[self.tid].pop()
+        if self.parent is not None: self.parent.kids.append(self)
+        _done.append(self)
+        return False
+
+    @property
+    def ms(self):
+        return (self.end - self.start) * 1000
+
+class _Off:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    args = {}
+
+_OFF = _Off()
+
+def span(name, cat="", **args):
+    """Context manager timing one step; a no-op unless --profile is on."""
+    return Span(name, cat, args) if ON else _OFF
+
+def traced(cat, label=None):
+    """Decorator: run every call of fn inside a span named label(*args, **kw) (default fn's name)."""
+    def wrap(fn):
+        def inner(*a, **kw):
+            if not ON: return fn(*a, **kw)
+            with Span(label(*a, **kw) if label else fn.__name__, cat, {}):
+                return fn(*a, **kw)
+        inner.__name__, inner.__doc__, inner.__wrapped__ = fn.__name__, fn.__doc__, fn
+        return inner
+    return wrap
+
+def setup(flag):
+    """flag is the --profile[=path] argument; returns the export path or None."""
+    global ON, _t0
+    ON, _t0 = True, time.perf_counter()
+    return flag.split("=", 1)[1] if "=" in flag else None
+
+# ---------- reporting ----------
+def _roots():
+    return sorted((s for s in _done if s.parent is None), key=lambda s: s.start)
+
+def _tree(s, depth, lines):
+    label = f"{'  ' * depth}{s.cat + ' ' if s.cat else ''}{s.name}"
+    if len(label) > 60: label = label[:59] + "…"
+    extra = f"  [{s.args['error']}]" if "error" in s.args else ""
+    off = (s.start - _t0) * 1000
+    lines.append(f"{label:<60} {s.ms:9.1f}ms  @{off:8.1f}ms{extra}")
+    for k in sorted(s.kids, key=lambda k: k.start):
+        _tree(k, depth + 1, lines)
+
+def totals():
+    """{category: ms} of wall clock covered by that category's spans; parallel and nested ones count once."""
+    spans = {}
+    for s in _done:
+        if s.cat and s.cat != "cmd": spans.setdefault(s.cat, []).append((s.start, s.end))
+    out = {}
+    for cat, iv in spans.items():
+        total, reach = 0.0, None
+        for a, b in sorted(iv):
+            if reach is None or a > reach: total, reach = total + b - a, b
+            elif b > reach: total, reach = total + b - reach, b
+        out[cat] = total * 1000
+    return out
+
+def report(stream=None):
+    stream = stream or sys.stderr
+    lines = []
+    for r in _roots(): _tree(r, 0, lines)
+    wall = (time.perf_counter() - _t0) * 1000
+    lines.append(f"{'total':<60} {wall:9.1f}ms")
+    for cat, ms in sorted(totals().items(), key=lambda kv: -kv[1]):
+        lines.append(f"  {cat:<58} {ms:9.1f}ms  {ms / wall * 100 if wall else 0:5.1f}%")
+    stream.write("\n".join(["--- profile ---"] + lines) + "\n")
+    stream.flush()
+
+def export(path):
+    """Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+    pid, tids = os.getpid(), {}
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "solar"}}]
+    for s in sorted(_done, key=lambda s: s.start):
+        tid = tids.setdefault(s.tid, len(tids))
+        events.append({"name": s.name, "cat": s.cat or "solar", "ph": "X", "pid": pid, "tid": tid,
+                       "ts": round((s.start - _t0) * 1e6, 1), "dur": round((s.end - s.start) * 1e6, 1),
+                       "args": s.args})
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    os.replace(tmp, path)
+
+def finish(path=None):
+    if not ON: return
+    report()
+    if path:
+        try:
+            export(path)
+            sys.stderr.write(f"trace written to {path}\n")
+        except OSError as e:
+            sys.stderr.write(f"cannot write trace: {e}\n")
@@ -0,0 +1,75 @@
+import re
+from functools import lru_cache
+
+# Release versions: 'v0.7', '0.7', '1.2.3', '1.2.3-rc.1', '1.2.3+build'.
+# Missing parts are 0, so 'v0.7' == '0.7.0'. A prerelease sorts before its
+# release, identifiers compared as in semver (numbers numerically, numbers
+# before words). Channel words some old builds append ('-stable') are not
+# prereleases.
+_RE = re.compile(r"^\s*v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]*)?\s*$")
+NOT_PRE = {"stable", "legacy", "release", "final"}
+CHANNEL = "stable"
+CLIENT = "Solar Neo"        # index names of releases that ship the solarneo package (0.5.0 on)
+
+@lru_cache(maxsize=256)
+def key(v):
+    """Sort key for a version string, or None when it isn't one."""
+    m = _RE.match(v) if isinstance(v, str) else None
+    if not m: return None
+    major, minor, patch, pre = m.groups()
+    nums = (int(major), int(minor or 0), int(patch or 0))
+    if not pre or pre.lower() in NOT_PRE:
+        return nums + (1, ())
+    ids = tuple((0, int(p), "") if p.isdigit() else (1, 0, p) for p in pre.split("."))
+    return nums + (0, ids)
+
+def is_pre(v):
+    k = key(v)
+    return bool(k) and k[3] == 0
+
+def compare(a, b):
+    """-1, 0 or 1 like a <=> b; None when either isn't a version."""
+    ka, kb = key(a), key(b)
+    if ka is None or kb is None: return None
+    return (ka > kb) - (ka < kb)
+
+def newer(a, b):
+    """Is a a newer version than b? Unparseable versions only differ if the strings do."""
+    c = compare(a, b)
+    return (a or "").strip() != (b or "").strip() if c is None else c > 0
+
+def same(a, b):
+    c = compare(a, b)
+    return (a or "").strip() == (b or "").strip() if c is None else c == 0
+
+# ---------- release index ----------
+def installable(entry):
+    """Can this client update itself to entry? Older builds ('Neo') are a different package."""
+    return (entry.get("name") or "").startswith(CLIENT)
+
+def by_channel(index, prerelease=False):
+    """{channel: [entries newest first]} of installable releases in Version_Index.json, with one sort."""
+    entries = [(e.get("channel") or CHANNEL, key(e.get("version")), i, e)
+               for i, e in enumerate((index or {}).get("versions", [])) if installable(e)]
+    entries = [t for t in entries if t[1] is not None and (prerelease or t[1][3])]
+    entries.sort(key=lambda t: (t[0], t[1], -t[2]), reverse=True)   # ties: first listed wins
+    out = {}
+    for ch, _, _, e in entries:
+        out.setdefault(ch, []).append(e)
+    return out
+
+def newest(index, channel=CHANNEL, prerelease=False):
+    """Newest release entry on a channel, or None."""
+    rel = by_channel(index, prerelease).get(channel)
+    return rel[0] if rel else None
+
+def find(index, tag):
+    """The index entry for tag ('v0.7' matches '0.7'), or None."""
+    k = key(tag)
+    if k is None: return None
+    return next((e for e in (index or {}).get("versions", []) if key(e.get("version")) == k), None)
+
+def tag(entry):
+    """Release tag for an index entry: '0.7' -> 'v0.7', as GitHub releases are named."""
+    v = (entry or {}).get("version") or ""
+    return v if v.startswith("v") else "v" + v
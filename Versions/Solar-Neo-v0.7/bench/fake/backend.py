@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Fake dnf5 / flatpak / rpm / sudo for benchmarks. Link this file under those
+names into a directory at the front of PATH (bench/suite.py does that).
+
+Environment:
+    FAKE_STATE     directory for installed.json and calls.log (one line per process)
+    FAKE_CATALOG   number of generated dnf packages (default 2000; flatpak gets a quarter)
+    FAKE_LATENCY   seconds every invocation sleeps before answering (default 0)
+"""
+import os, sys, json, time
+
+STATE = os.environ.get("FAKE_STATE") or os.path.join(os.getcwd(), ".fake-state")
+CATALOG = int(os.environ.get("FAKE_CATALOG") or 2000)
+LATENCY = float(os.environ.get("FAKE_LATENCY") or 0)
+
+KNOWN_RPMS = [
+    ("firefox", "Mozilla Firefox Web browser"),
+    ("vim-enhanced", "A version of the VIM editor which includes recent enhancements"),
+    ("nano", "A small text editor"),
+    ("obs-studio", "Open Broadcaster Software, Studio"),
+    ("vlc", "The cross-platform open-source multimedia framework, player and server"),
+    ("gimp", "GNU Image Manipulation Program"),
+    ("bash", "The GNU Bourne Again shell"),
+]
+KNOWN_APPS = [
+    ("org.mozilla.firefox", "Firefox", "Fast, Private & Safe Web Browser"),
+    ("com.obsproject.Studio", "OBS Studio", "Live streaming and video recording software"),
+    ("org.videolan.VLC", "VLC", "VLC media player, the open-source multimedia player"),
+    ("org.gimp.GIMP", "GNU Image Manipulation Program", "Create images and edit photographs"),
+]
+PREINSTALLED = {"dnf": ["bash", "vim-enhanced"], "flatpak": []}
+
+def rpms():
+    for name, summary in KNOWN_RPMS:
+        yield {"name": name, "version": "1.0-1.fc41", "arch": "x86_64", "repo": "fedora", "summary": summary}
+    for i in range(CATALOG):
+        yield {"name": f"pkg{i:05d}", "version": f"{i % 9}.{i % 7}-1.fc41", "arch": "x86_64",
+               "repo": "fedora", "summary": f"Benchmark package {i} for tool{i % 97} and lib{i % 31}"}
+
+def apps():
+    for app, name, desc in KNOWN_APPS:
+        yield {"application": app, "version": "1.0", "branch": "stable", "arch": "x86_64",
+               "origin": "flathub", "remotes": "flathub", "name": name, "description": desc}
+    for i in range(CATALOG // 4):
+        yield {"application": f"org.bench.App{i:05d}", "version": f"{i % 5}.0", "branch": "stable",
+               "arch": "x86_64", "origin": "flathub", "remotes": "flathub",
+               "name": f"Bench App {i}", "description": f"Benchmark application {i} for tool{i % 97}"}
+
+# ---------- state ----------
+def _path(name):
+    os.makedirs(STATE, exist_ok=True)
+    return os.path.join(STATE, name)
+
+def installed():
+    try:
+        with open(_path("installed.json"), encoding="utf-8") as f: return json.load(f)
+    except (OSError, ValueError):
+        return {k: list(v) for k, v in PREINSTALLED.items()}
+
+def save(state):
+    tmp = _path(f".installed.{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f: json.dump(state, f)
+    os.replace(tmp, _path("installed.json"))
+
+def log_call(argv):
+    with open(_path("calls.log"), "a", encoding="utf-8") as f:
+        f.write(" ".join(argv) + "\n")
+
+def _matches(q, *fields):
+    q = q.lower()
+    return any(q in f.lower() for f in fields)
+
+def _columns(args, default):
+    for a in args:
+        if a.startswith("--columns="): return a.split("=", 1)[1].split(",")
+    return default
+
+def _positional(args):
+    return [a for a in args if not a.startswith("-")]
+
+# ---------- dnf5 ----------
+def dnf5(args):
+    cmd, rest = (args[0], args[1:]) if args else ("", [])
+    if cmd == "--version":
+        print("dnf5 version 5.2.0"); return 0
+    if cmd == "search":
+        terms = _positional(rest)
+        print("Updating and loading repositories:\nRepositories loaded.\nMatched fields: name, summary")
+        for p in rpms():
+            if all(_matches(t, p["name"], p["summary"]) for t in terms):
+                print(f" {p['name']}.{p['arch']}\t{p['summary']}")
+        return 0
+    if cmd == "repoquery":
+        fmt = rest[rest.index("--queryformat") + 1] if "--queryformat" in rest else "%{name}\n"
+        names = set(_positional([a for a in rest if a != fmt]))
+        for p in rpms():
+            if names and p["name"] not in names: continue
+            sys.stdout.write(fmt.replace("%{name}", p["name"]).replace("%{version}-%{release}", p["version"])
+                             .replace("%{arch}", p["arch"]).replace("%{repoid}", p["repo"])
+                             .replace("%{summary}", p["summary"]).replace("\\n", "\n").replace("\\t", "\t"))
+        return 0
+    if cmd == "list" and "--installed" in rest:
+        print("Installed packages")
+        for n in installed()["dnf"]:
+            print(f"{n}.x86_64  1.0-1.fc41  @System")
+        return 0
+    if cmd in ("install", "remove"):
+        known = {p["name"] for p in rpms()}
+        names = _positional(rest)
+        missing = [n for n in names if n not in known]
+        if missing and "--skip-unavailable" not in rest and cmd == "install":
+            print(f"No match for argument: {missing[0]}", file=sys.stderr); return 1
+        state = installed()
+        cur = set(state["dnf"])
+        cur = cur | (set(names) & known) if cmd == "install" else cur - set(names)
+        state["dnf"] = sorted(cur)
+        save(state)
+        print("Complete!"); return 0
+    print(f"dnf5: unsupported: {' '.join(args)}", file=sys.stderr)
+    return 2
+
+# ---------- flatpak ----------
+def flatpak(args):
+    cmd, rest = (args[0], args[1:]) if args else ("", [])
+    if cmd == "--version":
+        print("Flatpak 1.15.10"); return 0
+    if cmd == "remotes":
+        print("flathub"); return 0
+    if cmd in ("search", "remote-ls"):
+        cols = _columns(rest, ["name", "description", "application", "version", "branch", "remotes"])
+        terms = _positional(rest)[1:] if cmd == "remote-ls" else _positional(rest)
+        for a in apps():
+            if cmd == "search" and not all(_matches(t, a["application"], a["name"], a["description"]) for t in terms):
+                continue
+            print("\t".join(a.get(c, "") for c in cols))
+        return 0
+    if cmd == "list":
+        cols = _columns(rest, ["application"])
+        if "--columns=application" not in rest: print("Application ID")
+        for app in installed()["flatpak"]:
+            print("\t".join(app if c == "application" else "" for c in cols))
+        return 0
+    if cmd in ("install", "uninstall"):
+        known = {a["application"]: a for a in apps()}
+        ids = [i for i in _positional(rest) if i != "flathub"]
+        state = installed()
+        cur = set(state["flatpak"])
+        if cmd == "install":
+            hits = {next((k for k in known if k == i or k.lower().rsplit(".", 1)[-1] == i.lower()), None) for i in ids}
+            if None in hits:
+                print("error: no remote refs found", file=sys.stderr); return 1
+            cur |= hits
+        else:
+            cur -= set(ids)
+        state["flatpak"] = sorted(cur)
+        save(state)
+        return 0
+    print(f"flatpak: unsupported: {' '.join(args)}", file=sys.stderr)
+    return 2
+
+# ---------- rpm / sudo ----------
+def rpm(args):
+    if args[:1] == ["-qa"]:
+        for n in installed()["dnf"]: print(n)
+        return 0
+    if args[:2] == ["-q", "--whatprovides"] and len(args) > 2:
+        have = installed()["dnf"]
+        return 0 if any(n == args[2] or n.startswith(args[2] + "-") for n in have) else 1
+    return 2
+
+def main(argv):
+    tool = os.path.basename(argv[0])
+    if tool == "sudo":
+        os.execvp(argv[1], argv[1:])        # no password, same process: not counted twice
+    log_call([tool] + argv[1:])
+    if LATENCY: time.sleep(LATENCY)
+    handler = {"dnf5": dnf5, "flatpak": flatpak, "rpm": rpm}.get(tool)
+    if handler is None:
+        print(f"fake backend: unknown tool {tool}", file=sys.stderr)
+        return 127
+    return handler(argv[1:])
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for everything the client fetches over HTTP:
+
+    /api?cmd=...                         API_BASE     (version, notes, notes_bulk, note_add, note_add_dev)
+    /pages/Versions/Version_Index.json   PAGES_BASE   (one extra release, 0.8, built from this tree)
+    /pages/Versions/<folder>/Release.zip
+    /github/<owner>/<repo>/releases/download/<tag>/<asset>
+    /__stats                             request and byte counters (not counted themselves)
+
+    python3 bench/fake/server.py [--port 8099] [--notes N]
+
+prints the SOLAR_*_BASE variables that point a client at it. bench/suite.py
+starts it in a thread instead. Notes are answered by the same as_notes()
+windowing as cgi-bin/submit_note.py, from memory.
+"""
+import os, sys, io, json, time, hashlib, zipfile, argparse, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+BENCH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RELEASE = os.path.join(os.path.dirname(BENCH), "Release")
+CGI_BIN = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(BENCH))), "cgi-bin")
+sys.path.insert(0, CGI_BIN)
+from submit_note import handle   # noqa: E402
+
+LATEST = "v0.8"
+SEED_APPS = ("org.mozilla.firefox", "com.obsproject.Studio", "org.videolan.VLC", "org.gimp.GIMP")
+
+class Notes:
+    """read_many/append over a dict of time-sorted notes; what submit_note's handlers expect."""
+    def __init__(self, per_app):
+        base = int(time.time() * 1000) - per_app * 60000
+        self.notes = {a: [{"msg": f"note {i} about {a}", "time": base + i * 60000} for i in range(per_app)]
+                      for a in SEED_APPS}
+        self.lock = threading.Lock()
+
+    def read_many(self, pkgs):
+        with self.lock:
+            return {p: list(self.notes.get(p, [])) for p in pkgs}
+
+    def append(self, pkg, note):
+        with self.lock:
+            notes = self.notes.setdefault(pkg, [])
+            notes.append({"msg": note, "time": max(int(time.time() * 1000), notes[-1]["time"] + 1 if notes else 0)})
+
+def build_release(tag=LATEST):
+    """Release.zip of this tree (version.txt set to tag), in memory: (bytes, sha256)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for d, dirs, files in os.walk(os.path.join(RELEASE, "solarneo")):
+            dirs[:] = [x for x in dirs if x != "__pycache__"]
+            for f in files:
+                p = os.path.join(d, f)
+                z.write(p, os.path.relpath(p, RELEASE))
+        z.writestr("version.txt", tag + "\n")
+    data = buf.getvalue()
+    return data, hashlib.sha256(data).hexdigest()
+
+class State:
+    def __init__(self, notes_per_app=200):
+        self.notes = Notes(notes_per_app)
+        self.zip, self.sha = build_release()
+        folder = f"Solar-Neo-{LATEST}"
+        self.index = {"generated": time.strftime("%Y-%m-%d"), "versions": [
+            {"name": "Solar Neo", "version": LATEST.lstrip("v"), "folder": folder, "channel": "stable",
+             "sha256": self.sha, "files": [{"name": "Release.zip", "path": f"{folder}/Release.zip"}]}]}
+        self.files = {f"/pages/Versions/{folder}/Release.zip": self.zip,
+                      "/pages/Versions/Version_Index.json": json.dumps(self.index).encode("utf-8")}
+        self.etag = '"' + self.sha[:16] + '"'
+        self.stats = {"requests": 0, "bytes_in": 0, "bytes_out": 0}
+        self.stats_lock = threading.Lock()
+
+    def count(self, n_in, n_out):
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_in"] += n_in
+            self.stats["bytes_out"] += n_out
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, *a):
+        pass
+
+    def _send(self, status, body=b"", headers=(), ctype="application/json", counted=True):
+        if isinstance(body, (dict, list)): body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers: self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD": self.wfile.write(body)
+        if counted: self.state.count(self._in, len(body))
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        self._in = n
+        if not n: return {}
+        try:
+            j = json.loads(self.rfile.read(n).decode("utf-8"))
+        except ValueError:
+            return {}
+        return j if isinstance(j, dict) else {}
+
+    def do_GET(self):
+        self._route(self._body())
+
+    def do_POST(self):
+        self._route(self._body())
+
+    def _route(self, payload):
+        u = urlsplit(self.path)
+        if u.path == "/__stats":
+            return self._send(200, dict(self.state.stats), counted=False)
+        if u.path == "/api":
+            return self._api(parse_qs(u.query), payload)
+        if u.path.startswith("/github/") and "/releases/download/" in u.path:
+            return self._file(self.state.zip, "application/zip")
+        data = self.state.files.get(u.path)
+        if data is None:
+            return self._send(404, {"ok": False, "error": "not found"})
+        self._file(data, "application/zip" if u.path.endswith(".zip") else "application/json")
+
+    def _file(self, data, ctype):
+        rng = self.headers.get("Range", "")
+        if rng.startswith("bytes=") and rng[6:].split("-")[0].isdigit():
+            start = int(rng[6:].split("-")[0])
+            if start >= len(data): return self._send(416, b"", [("Content-Range", f"bytes */{len(data)}")], ctype)
+            return self._send(206, data[start:], [("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")], ctype)
+        self._send(200, data, [("Accept-Ranges", "bytes")], ctype)
+
+    def _api(self, query, payload):
+        cmd = query.get("cmd", [""])[0]
+        st = self.state
+        if cmd == "version":
+            if self.headers.get("If-None-Match") == st.etag:
+                return self._send(304, b"", [("ETag", st.etag)])
+            return self._send(200, {"latest_version": LATEST}, [("ETag", st.etag)])
+        if cmd in ("notes", "notes_bulk"):
+            return self._send(*handle(st.notes, self.command, query, payload))
+        if cmd in ("note_add", "note_add_dev"):
+            app, text = str(payload.get("app") or ""), str(payload.get("text") or "")
+            if not app or not text:
+                return self._send(400, {"ok": False, "error": "app and text required"})
+            st.notes.append(app, text)
+            return self._send(200, {"ok": True})
+        self._send(400, {"ok": False, "error": f"unknown cmd {cmd!r}"})
+
+def serve(port=0, notes_per_app=200):
+    """Start in a daemon thread: (server, base url)."""
+    handler = type("BoundHandler", (Handler,), {"state": State(notes_per_app)})
+    srv = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+def client_env(base):
+    return {"SOLAR_API_BASE": f"{base}/api", "SOLAR_PAGES_BASE": f"{base}/pages",
+            "SOLAR_GITHUB_BASE": f"{base}/github"}
+
+def main(argv):
+    ap = argparse.ArgumentParser(description="Solar Neo fake HTTP backend")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--notes", type=int, default=200, help="seeded notes per app")
+    a = ap.parse_args(argv)
+    srv, base = serve(a.port, a.notes)
+    for k, v in client_env(base).items(): print(f"export {k}={v}")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,66 @@
+"""
+Startup benchmark for the solar CLI.
+
+    python3 bench/startup.py [--runs N] [subcommand ...]
+
+For each subcommand (default: the usage screen, `sys` and `list`) it runs
+`python -X importtime -m solarneo <subcommand>` once to get total import time
+and the costliest top-level imports, then times N plain runs and reports the
+median and worst wall clock. Runs use a throwaway HOME so caches start cold
+for the first run and warm for the rest, like a fresh shell session.
+"""
+import os, sys, shlex, tempfile, subprocess, statistics, time
+
+RELEASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Release")
+TOP = 5
+
+def _env(home):
+    env = dict(os.environ, HOME=home, PYTHONPATH=RELEASE)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)   # time what installs see: cached bytecode
+    return env
+
+def _run(args, env, extra=()):
+    t = time.perf_counter()
+    p = subprocess.run([sys.executable, *extra, "-m", "solarneo", *args], env=env,
+                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return time.perf_counter() - t, p.stderr.decode("utf-8", "replace")
+
+def import_times(stderr):
+    """[(cumulative_us, module)] for top-level imports from -X importtime output."""
+    out = []
+    for ln in stderr.splitlines():
+        if not ln.startswith("import time:") or "|" not in ln: continue
+        _, cum, name = ln.split("|", 2)
+        if name.startswith("  ") or not cum.strip().isdigit(): continue   # nested import
+        out.append((int(cum), name.strip()))
+    return out
+
+def bench(args, runs):
+    with tempfile.TemporaryDirectory(prefix="solar-bench-") as home:
+        env = _env(home)
+        _, err = _run(args, env, ("-X", "importtime"))
+        imports = import_times(err)
+        walls = [_run(args, env)[0] for _ in range(runs)]
+    return {
+        "imports_ms": sum(c for c, _ in imports) / 1000,
+        "top": sorted(imports, reverse=True)[:TOP],
+        "median_ms": statistics.median(walls) * 1000,
+        "max_ms": max(walls) * 1000,
+    }
+
+def main(argv):
+    runs = 10
+    if argv[:1] == ["--runs"]:
+        runs, argv = int(argv[1]), argv[2:]
+    cmds = argv or ["", "sys", "list"]
+    subprocess.run([sys.executable, "-m", "compileall", "-q", os.path.join(RELEASE, "solarneo")], check=True)
+    print(f"{'command':<16} {'imports':>9} {'median':>9} {'max':>9}")
+    for c in cmds:
+        r = bench(shlex.split(c), runs)
+        print(f"{'solar ' + c:<16} {r['imports_ms']:7.1f}ms {r['median_ms']:7.1f}ms {r['max_ms']:7.1f}ms")
+        for cum, name in r["top"]:
+            print(f"    {cum / 1000:6.1f}ms  {name}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
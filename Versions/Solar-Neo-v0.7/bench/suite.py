@@ -0,0 +1,149 @@
+"""
+End-to-end benchmark suite for the solar CLI, fully offline.
+
+    python3 bench/suite.py [--runs N] [--latency S] [--catalog N] [--only name,...] [--json]
+
+Every scenario runs `python -m solarneo <args> --json` against bench/fake:
+backend.py stands in for dnf5/flatpak/rpm/sudo (linked into a private PATH)
+and server.py for the notes/version API, the release index and the release
+downloads. Per scenario it reports wall clock p50/p99/max, the backend
+subprocesses started and the HTTP requests and payload bytes each run cost.
+
+A scenario's `reset` paths (relative to the throwaway HOME) are deleted
+before every run, so "cold" runs start without that cache and "warm" runs
+reuse what the previous run left.
+"""
+import os, sys, json, shutil, tempfile, subprocess, statistics, time, argparse
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+RELEASE = os.path.join(os.path.dirname(BENCH), "Release")
+sys.path.insert(0, os.path.join(BENCH, "fake"))
+import server    # noqa: E402
+
+TOOLS = ("dnf5", "flatpak", "rpm", "sudo")
+CACHE = ".cache/solarneo"
+INSTALL = ".local/share/solarneo"
+
+# name, solar args, paths to delete before each run
+SCENARIOS = [
+    ("version",       ["version"],                         []),
+    ("sys",           ["sys"],                             [f"{CACHE}/caps.json"]),
+    ("list",          ["list"],                            []),
+    ("search-cold",   ["search", "tool42"],                 [f"{CACHE}/search-index.db", f"{CACHE}/caps.json"]),
+    ("search-warm",   ["search", "tool42"],                 []),
+    ("install",       ["install", "pkg00042", "firefox"],  [f"{CACHE}/resolve.json"]),
+    ("remove",        ["remove", "pkg00042"],              []),
+    ("notes-cold",    ["notes", "firefox", "vlc", "obs"],  [f"{CACHE}/notes"]),
+    ("notes-warm",    ["notes", "firefox", "vlc", "obs"],  []),
+    ("update-full",   ["update", "--yes"],                 [INSTALL, f"{CACHE}/archives", f"{CACHE}/downloads",
+                                                            f"{CACHE}/version.json"]),
+    ("update-cached", ["update", "--yes"],                 [INSTALL, f"{CACHE}/version.json"]),
+]
+
+def percentile(xs, p):
+    xs = sorted(xs)
+    k = (len(xs) - 1) * p / 100
+    lo = int(k)
+    return xs[lo] + (xs[min(lo + 1, len(xs) - 1)] - xs[lo]) * (k - lo)
+
+class Workspace:
+    """Throwaway HOME, fake tool dir and backend state, plus the fake HTTP server."""
+    def __init__(self, latency, catalog, notes):
+        self.root = tempfile.mkdtemp(prefix="solar-suite-")
+        self.home = os.path.join(self.root, "home")
+        self.state = os.path.join(self.root, "state")
+        bin_dir = os.path.join(self.root, "bin")
+        for d in (self.home, self.state, bin_dir): os.makedirs(d)
+        for t in TOOLS:
+            os.symlink(os.path.join(BENCH, "fake", "backend.py"), os.path.join(bin_dir, t))
+        self.srv, self.base = server.serve(notes_per_app=notes)
+        self.env = dict(os.environ, HOME=self.home, PYTHONPATH=RELEASE,
+                        PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""),
+                        FAKE_STATE=self.state, FAKE_LATENCY=str(latency), FAKE_CATALOG=str(catalog),
+                        **server.client_env(self.base))
+        self.env.pop("PYTHONDONTWRITEBYTECODE", None)
+        self.env.pop("SOLAR_ARCHIVE_DIR", None)
+
+    def calls(self):
+        try:
+            with open(os.path.join(self.state, "calls.log"), encoding="utf-8") as f:
+                return sum(1 for _ in f)
+        except OSError:
+            return 0
+
+    def http(self):
+        return dict(self.srv.RequestHandlerClass.state.stats)
+
+    def close(self):
+        self.srv.shutdown()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+def run_once(ws, args, reset):
+    for rel in reset:
+        p = os.path.join(ws.home, rel)
+        if os.path.isdir(p) and not os.path.islink(p): shutil.rmtree(p, ignore_errors=True)
+        elif os.path.lexists(p): os.remove(p)
+    calls, http = ws.calls(), ws.http()
+    t = time.perf_counter()
+    p = subprocess.run([sys.executable, "-m", "solarneo", *args, "--json"], env=ws.env,
+                       stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    wall = time.perf_counter() - t
+    after = ws.http()
+    try:
+        records = json.loads(p.stdout.decode("utf-8") or "[]")
+    except ValueError:
+        records = None
+    return {"wall": wall, "code": p.returncode, "ok": p.returncode == 0 and records is not None,
+            "procs": ws.calls() - calls, "requests": after["requests"] - http["requests"],
+            "bytes": after["bytes_in"] + after["bytes_out"] - http["bytes_in"] - http["bytes_out"],
+            "stderr": p.stderr.decode("utf-8", "replace")}
+
+def bench(ws, name, args, reset, runs):
+    rs = [run_once(ws, args, reset) for _ in range(runs)]
+    walls = [r["wall"] * 1000 for r in rs]
+    fails = [r for r in rs if not r["ok"]]
+    return {"name": name, "args": args, "runs": runs,
+            "p50_ms": percentile(walls, 50), "p99_ms": percentile(walls, 99), "max_ms": max(walls),
+            "procs": statistics.median(r["procs"] for r in rs),
+            "requests": statistics.median(r["requests"] for r in rs),
+            "bytes": statistics.median(r["bytes"] for r in rs),
+            "failures": len(fails), "last_error": fails[-1]["stderr"][-500:] if fails else None}
+
+def main(argv):
+    ap = argparse.ArgumentParser(description="Solar Neo offline benchmark suite")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds each fake backend call sleeps")
+    ap.add_argument("--catalog", type=int, default=2000, help="generated dnf packages (flatpak gets a quarter)")
+    ap.add_argument("--notes", type=int, default=200, help="seeded notes per app")
+    ap.add_argument("--only", default="", help="comma-separated scenario names")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    a = ap.parse_args(argv)
+    only = set(filter(None, a.only.split(",")))
+    unknown = only - {s[0] for s in SCENARIOS}
+    if unknown:
+        ap.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    subprocess.run([sys.executable, "-m", "compileall", "-q", os.path.join(RELEASE, "solarneo")], check=True)
+    ws = Workspace(a.latency, a.catalog, a.notes)
+    results = []
+    try:
+        for name, args, reset in SCENARIOS:
+            if only and name not in only: continue
+            results.append(bench(ws, name, args, reset, a.runs))
+            if not a.json: report(results[-1], header=len(results) == 1)
+    finally:
+        ws.close()
+    if a.json:
+        print(json.dumps(results, indent=2))
+    return 1 if any(r["failures"] for r in results) else 0
+
+def report(r, header=False):
+    if header:
+        print(f"{'scenario':<14} {'p50':>9} {'p99':>9} {'max':>9} {'procs':>6} {'http':>5} {'bytes':>10}  fail")
+    print(f"{r['name']:<14} {r['p50_ms']:7.1f}ms {r['p99_ms']:7.1f}ms {r['max_ms']:7.1f}ms "
+          f"{r['procs']:6g} {r['requests']:5g} {r['bytes']:10g}  {r['failures']}")
+    if r["last_error"]:
+        print("    " + r["last_error"].strip().replace("\n", "\n    "))
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,28 @@
+"""Canonical app ids for the notes store.
+
+Server-side mirror of ``solarneo/utils/appid.py`` in the v0.7 client; keep the
+two alias tables in sync so both ends pick the same key for an app.
+"""
+
+ALIASES = {
+    'obs': 'com.obsproject.Studio',
+    'vlc': 'org.videolan.VLC',
+    'gimp': 'org.gimp.GIMP',
+    'inkscape': 'org.inkscape.Inkscape',
+    'kdenlive': 'org.kde.kdenlive',
+    'discord': 'com.discordapp.Discord',
+    'spotify': 'com.spotify.Client',
+    'steam': 'com.valvesoftware.Steam',
+    'zoom': 'us.zoom.Zoom',
+    'vscode': 'com.visualstudio.code',
+}
+_IDS = {v.casefold(): v for v in ALIASES.values()}
+
+
+def fold(name: str) -> str:
+    return ' '.join((name or '').split()).casefold()
+
+
+def canonical(name: str) -> str:
+    key = fold(name)
+    return ALIASES.get(key) or _IDS.get(key) or key
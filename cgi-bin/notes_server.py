@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Long-running notes service: the submit_note.py contract without a process per request.
+
+All notes live in memory, keyed by canonical app id, so reads never touch the
+disk. Submissions are applied in memory and answered right away. A background
+task then writes them to the same append-only store (notes_store.py) in
+batches, every FLUSH_INTERVAL seconds. On shutdown whatever is still pending
+is flushed.
+
+    python3 cgi-bin/notes_server.py [--host 127.0.0.1] [--port 8088] [--root notes/]
+
+The server owns the store while it runs; don't also point the CGI script at it.
+"""
+import argparse
+import asyncio
+import json
+import signal
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from notes_store import NotesStore, by_time, record
+from submit_note import REPO_ROOT, handle
+
+FLUSH_INTERVAL = 0.2
+MAX_BODY = 1 << 20
+MAX_HEADERS = 64
+STATUS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 405: 'Method Not Allowed',
+          413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class MemoryStore:
+    """read_many/append like NotesStore, served from memory with a write-behind journal."""
+
+    def __init__(self, disk: NotesStore) -> None:
+        self.disk = disk
+        self.notes = disk.load_all()
+        self.pending = []
+
+    def read_many(self, pkgs) -> dict:
+        return {pkg: self.notes.get(pkg, []) for pkg in pkgs}
+
+    def append(self, pkg: str, note: str) -> dict:
+        rec = record(pkg, note)
+        notes = self.notes.setdefault(pkg, [])
+        notes.append({'msg': note, 'time': rec['time']})
+        if len(notes) > 1 and notes[-2]['time'] > rec['time']:
+            notes.sort(key=by_time)         # clock stepped back; keep the bisect invariant
+        self.pending.append(rec)
+        return rec
+
+    def take(self) -> list:
+        batch, self.pending = self.pending, []
+        return batch
+
+    def flush(self) -> None:
+        self.disk.append_many(self.take())
+
+
+async def journal(store: MemoryStore) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        batch = store.take()          # swapped on the loop thread, written off it
+        if not batch:
+            continue
+        try:
+            await loop.run_in_executor(None, store.disk.append_many, batch)
+        except OSError as exc:
+            store.pending[:0] = batch   # keep them for the next round
+            print(f'notes journal: flush failed, will retry: {exc}', flush=True)
+
+
+def render(status: int, body: dict, keep_alive: bool) -> bytes:
+    data = json.dumps(body).encode('utf-8')
+    head = (
+        f'HTTP/1.1 {status} {STATUS.get(status, "Unknown")}\r\n'
+        'Content-Type: application/json\r\n'
+        'Cache-Control: no-store\r\n'
+        f'Content-Length: {len(data)}\r\n'
+        f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+    )
+    return head.encode('latin-1') + data
+
+
+async def serve_client(store: MemoryStore, reader, writer) -> None:
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                break
+            if not line.strip():
+                break
+            try:
+                method, target, version = line.decode('latin-1').split()
+            except ValueError:
+                writer.write(render(400, {'ok': False, 'error': 'Bad request line'}, False))
+                break
+            headers = {}
+            for _ in range(MAX_HEADERS):
+                h = await reader.readline()
+                if h in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = h.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            conn = headers.get('connection', '').lower()
+            keep_alive = conn != 'close' if version == 'HTTP/1.1' else conn == 'keep-alive'
+
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0 or length > MAX_BODY:
+                writer.write(render(413 if length > MAX_BODY else 400,
+                                    {'ok': False, 'error': 'Bad request body'}, False))
+                break
+            body = await reader.readexactly(length) if length else b''
+
+            payload = {}
+            if method.upper() == 'POST' and body:
+                try:
+                    payload = json.loads(body.decode('utf-8'))
+                except ValueError:
+                    payload = {}
+                if not isinstance(payload, dict):
+                    payload = {}
+            query = parse_qs(urlsplit(target).query)
+            try:
+                status, out = handle(store, method.upper(), query, payload)
+            except Exception:
+                status, out = 500, {'ok': False, 'error': 'Internal error'}
+            writer.write(render(status, out, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, root: Path) -> None:
+    store = MemoryStore(NotesStore(root))
+    server = await asyncio.start_server(lambda r, w: serve_client(store, r, w), host, port)
+    flusher = asyncio.ensure_future(journal(store))
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    print(f'notes server on http://{host}:{port}/ ({sum(map(len, store.notes.values()))} notes)', flush=True)
+    try:
+        await stop.wait()
+    finally:
+        server.close()
+        await server.wait_closed()
+        flusher.cancel()
+        store.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Solar Neo notes server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--root', type=Path, default=REPO_ROOT / 'notes')
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.root))
+
+
+if __name__ == '__main__':
+    main()
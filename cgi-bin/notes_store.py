@@ -0,0 +1,394 @@
+"""Append-only notes store for the CGI endpoints.
+
+Writes append one JSON line to ``notes.log`` under an exclusive ``flock``, so
+their cost doesn't depend on how many notes exist and concurrent submissions
+can't overwrite each other. Once the log grows past ``COMPACT_BYTES`` it is
+folded into the snapshot and truncated. Reads go through ``notes.idx``
+(package -> log offsets), which is caught up from the log tail on demand, so
+a lookup seeks to its own records instead of scanning the log.
+
+The snapshot, ``notes.snap``, holds one line per package,
+``{"pkg": ..., "notes": [note, ...]}``, and ``notes.snap.idx`` maps each
+package to its line, so a read parses only the packages asked for. Legacy
+notes are plain strings (time 0), compacted ones ``{"msg": ..., "time": ms}``.
+
+``notes.json`` (``{pkg: [note, ...]}``, the old snapshot and the seed tracked
+in the repo) is only ever read: its notes are merged into the snapshot on
+first use and again whenever the file changes (``notes.seeded`` remembers
+which version was merged). Every other file here is generated.
+"""
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+COMPACT_BYTES = 1 << 20
+
+
+class NotesStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.snapshot_path = self.root / 'notes.snap'
+        self.snapshot_index_path = self.root / 'notes.snap.idx'
+        self.legacy_path = self.root / 'notes.json'
+        self.seeded_path = self.root / 'notes.seeded'
+        self.log_path = self.root / 'notes.log'
+        self.index_path = self.root / 'notes.idx'
+        self.lock_path = self.root / '.notes.lock'
+
+    # ---------- locking ----------
+    @contextmanager
+    def _locked(self, mode: int):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a') as fh:
+            fcntl.flock(fh, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _write_atomic(self, path: Path, data) -> None:
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with tmp.open('w', encoding='utf-8') as fh:
+            json.dump(data, fh, ensure_ascii=False)
+            fh.write('\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+
+    # ---------- snapshot ----------
+    def _snapshot(self) -> dict:
+        """Every package's snapshot bucket, for compaction and full loads."""
+        if not self.snapshot_path.exists():
+            return self._legacy()
+        out = {}
+        with self.snapshot_path.open('rb') as fh:
+            for line in fh:
+                entry = snapshot_entry(line)
+                if entry:
+                    out[entry['pkg']] = entry['notes']
+        return out
+
+    def _legacy(self) -> dict:
+        try:
+            with self.legacy_path.open('r', encoding='utf-8') as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write_snapshot(self, snap: dict) -> None:
+        """Replace the snapshot and its line index. Call with LOCK_EX."""
+        tmp = self.snapshot_path.with_name(f'.{self.snapshot_path.name}.{os.getpid()}.tmp')
+        offsets = {}
+        with tmp.open('wb') as fh:
+            for pkg in sorted(snap):
+                offsets[pkg] = fh.tell()
+                fh.write((json.dumps({'pkg': pkg, 'notes': snap[pkg]}, ensure_ascii=False) + '\n').encode('utf-8'))
+            size = fh.tell()
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.snapshot_path)
+        try:
+            self._write_atomic(self.snapshot_index_path, {'size': size, 'offsets': offsets})
+        except OSError:
+            pass                            # rebuilt by the next read
+
+    def _snapshot_offsets(self, rebuild: bool = False) -> dict:
+        """Line offset per package in the snapshot. Call with a lock held."""
+        try:
+            size = self.snapshot_path.stat().st_size
+        except FileNotFoundError:
+            return {}
+        idx = None
+        if not rebuild:
+            try:
+                with self.snapshot_index_path.open('r', encoding='utf-8') as fh:
+                    idx = json.load(fh)
+            except (OSError, ValueError):
+                pass
+        if not isinstance(idx, dict) or idx.get('size') != size:
+            # missing, or left behind by a crash between the two renames: one scan
+            idx, offset = {'size': size, 'offsets': {}}, 0
+            with self.snapshot_path.open('rb') as fh:
+                for line in fh:
+                    entry = snapshot_entry(line)
+                    if entry:
+                        idx['offsets'][entry['pkg']] = offset
+                    offset += len(line)
+            try:
+                self._write_atomic(self.snapshot_index_path, idx)
+            except OSError:
+                pass
+        return idx['offsets']
+
+    def _snapshot_many(self, pkgs, rebuild: bool = False) -> dict:
+        """{pkg: bucket} read by seeking to each package's line. Call with a lock held."""
+        offsets = self._snapshot_offsets(rebuild)
+        if not offsets:
+            return {}
+        out = {}
+        with self.snapshot_path.open('rb') as fh:
+            for pkg in pkgs:
+                if pkg not in offsets:
+                    continue
+                fh.seek(offsets[pkg])
+                entry = snapshot_entry(fh.readline())
+                if not entry or entry['pkg'] != pkg:
+                    if rebuild:
+                        continue
+                    return self._snapshot_many(pkgs, rebuild=True)     # stale index
+                out[pkg] = entry['notes']
+        return out
+
+    def _legacy_signature(self):
+        try:
+            st = self.legacy_path.stat()
+        except FileNotFoundError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def _seeded(self):
+        try:
+            with self.seeded_path.open('r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _seed(self) -> None:
+        """Merge notes.json into the snapshot if this version of it hasn't been yet."""
+        sig = self._legacy_signature()
+        if sig is None or self._seeded() == sig:
+            return
+        with self._locked(fcntl.LOCK_EX):
+            sig = self._legacy_signature()
+            if sig is None or self._seeded() == sig:
+                return
+            snap = self._snapshot() if self.snapshot_path.exists() else {}
+            for pkg, bucket in self._legacy().items():
+                snap[pkg] = merge_notes(snap.get(pkg), bucket)
+            self._write_snapshot(snap)
+            self._write_atomic(self.seeded_path, sig)
+
+    # ---------- log ----------
+
+    def _records(self, start: int = 0):
+        """Yield (offset, end, record) per complete log line; record is None if unreadable."""
+        try:
+            fh = self.log_path.open('rb')
+        except FileNotFoundError:
+            return
+        with fh:
+            fh.seek(start)
+            offset = start
+            for line in fh:
+                if not line.endswith(b'\n'):
+                    break                   # torn tail from a crashed writer
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    rec = None
+                if not (isinstance(rec, dict) and rec.get('pkg')):
+                    rec = None
+                yield offset, offset + len(line), rec
+                offset += len(line)
+
+    def _log_size(self) -> int:
+        try:
+            return self.log_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    # ---------- index ----------
+    def _index(self) -> dict:
+        """Offsets per package, caught up with the log. Call with a lock held."""
+        try:
+            with self.index_path.open('r', encoding='utf-8') as fh:
+                idx = json.load(fh)
+        except (OSError, ValueError):
+            idx = None
+        size = self._log_size()
+        if not isinstance(idx, dict) or idx.get('size', 0) > size:
+            idx = {'size': 0, 'offsets': {}}
+        if idx['size'] < size:
+            for offset, end, rec in self._records(idx['size']):
+                if rec:
+                    idx['offsets'].setdefault(rec['pkg'], []).append(offset)
+                idx['size'] = end
+            try:
+                self._write_atomic(self.index_path, idx)
+            except OSError:
+                pass                        # still correct, just rebuilt next time
+        return idx
+
+    def _read_at(self, fh, offset: int):
+        fh.seek(offset)
+        try:
+            rec = json.loads(fh.readline())
+        except ValueError:
+            return None
+        return rec if isinstance(rec, dict) else None
+
+    # ---------- public ----------
+    def append(self, pkg: str, note: str) -> dict:
+        rec = record(pkg, note)
+        self.append_many([rec])
+        return rec
+
+    def append_many(self, records: list) -> None:
+        """Append records in one locked write and one fsync."""
+        data = b''.join((json.dumps(r, ensure_ascii=False) + '\n').encode('utf-8') for r in records)
+        if not data:
+            return
+        with self._locked(fcntl.LOCK_EX):
+            fd = os.open(self.log_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                end = os.fstat(fd).st_size
+                if end and os.pread(fd, 1, end - 1) != b'\n':
+                    data = b'\n' + data        # seal a torn line so ours parses
+                os.write(fd, data)
+                os.fsync(fd)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size >= COMPACT_BYTES:
+                self._compact()
+
+    def load_all(self) -> dict:
+        """Every note, {pkg: [{"msg", "time"}, ...]} oldest first."""
+        self._seed()
+        with self._locked(fcntl.LOCK_SH):
+            out = {pkg: [as_note(n) for n in bucket or [] if as_note(n)]
+                   for pkg, bucket in self._snapshot().items()}
+            for _, _, rec in self._records():
+                if rec:
+                    out.setdefault(rec['pkg'], []).append({'msg': rec.get('note', ''), 'time': rec.get('time', 0)})
+        for notes in out.values():
+            notes.sort(key=by_time)
+        return out
+
+    def read_many(self, pkgs) -> dict:
+        """{pkg: [{"msg", "time"}, ...]} sorted by time, for each requested package."""
+        out = {}
+        self._seed()
+        with self._locked(fcntl.LOCK_SH):
+            snap = self._snapshot_many(pkgs)
+            offsets = self._index()['offsets']
+            try:
+                log = self.log_path.open('rb')
+            except FileNotFoundError:
+                log = None
+            try:
+                for pkg in pkgs:
+                    notes = [as_note(n) for n in snap.get(pkg) or [] if as_note(n)]
+                    for off in offsets.get(pkg, []) if log else []:
+                        rec = self._read_at(log, off)
+                        if rec and rec.get('pkg') == pkg:
+                            notes.append({'msg': rec.get('note', ''), 'time': rec.get('time', 0)})
+                    notes.sort(key=by_time)     # concurrent writers may land slightly out of order
+                    out[pkg] = notes
+            finally:
+                if log:
+                    log.close()
+        return out
+
+    def read(self, pkg: str) -> list:
+        return self.read_many([pkg])[pkg]
+
+    def compact(self) -> None:
+        with self._locked(fcntl.LOCK_EX):
+            self._compact()
+
+    def rekey(self, key, dry_run: bool = False) -> dict:
+        """Compact, then merge buckets whose key(pkg) agree. Returns the {old: new} renames."""
+        with self._locked(fcntl.LOCK_EX):
+            if not dry_run:
+                self._compact()
+            snap = self._snapshot()
+            pkgs = set(snap) | {rec['pkg'] for _, _, rec in self._records() if rec}
+            renames = {pkg: key(pkg) for pkg in sorted(pkgs) if key(pkg) != pkg}
+            if renames and not dry_run:
+                merged = {}
+                for pkg, bucket in snap.items():
+                    notes = [as_note(n) for n in bucket or [] if as_note(n)]
+                    merged.setdefault(key(pkg), []).extend(notes)
+                for notes in merged.values():
+                    notes.sort(key=by_time)
+                self._write_snapshot(merged)
+                self._rekey_legacy(key)
+        return renames
+
+    def _rekey_legacy(self, key) -> None:
+        """Re-key notes.json in place too, so the next seeding doesn't bring old keys back."""
+        legacy = self._legacy()
+        if not any(key(pkg) != pkg for pkg in legacy):
+            return
+        merged = {}
+        for pkg, bucket in legacy.items():
+            merged[key(pkg)] = merge_notes(merged.get(key(pkg)), bucket)
+        tmp = self.legacy_path.with_name(f'.{self.legacy_path.name}.{os.getpid()}.tmp')
+        with tmp.open('w', encoding='utf-8') as fh:
+            json.dump(merged, fh, indent=2, ensure_ascii=False)
+            fh.write('\n')
+        os.replace(tmp, self.legacy_path)
+        self._write_atomic(self.seeded_path, self._legacy_signature())
+
+    def _compact(self) -> None:
+        records = [rec for _, _, rec in self._records() if rec]
+        if not records:
+            return
+        snap = self._snapshot()
+        for rec in records:
+            bucket = snap.get(rec['pkg'])
+            if not isinstance(bucket, list):
+                bucket = snap[rec['pkg']] = []
+            bucket.append({'msg': rec.get('note', ''), 'time': rec.get('time', 0)})
+        self._write_snapshot(snap)
+        # snapshot is durable; now drop what it absorbed
+        with self.log_path.open('r+b') as fh:
+            fh.truncate(0)
+        try:
+            self.index_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def record(pkg: str, note: str) -> dict:
+    return {'pkg': pkg, 'note': note, 'time': int(time.time() * 1000)}
+
+
+def snapshot_entry(line: bytes):
+    """The {"pkg", "notes"} entry on one snapshot line, or None."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(entry, dict) and entry.get('pkg') and isinstance(entry.get('notes'), list):
+        return entry
+    return None
+
+
+def merge_notes(old, new) -> list:
+    """Both buckets' notes once each ((time, msg) identifies a note), oldest first."""
+    out, seen = [], set()
+    for n in (old or []) + (new or []):
+        n = as_note(n)
+        if n and (n['time'], n['msg']) not in seen:
+            seen.add((n['time'], n['msg']))
+            out.append(n)
+    out.sort(key=by_time)
+    return out
+
+
+def by_time(note: dict) -> int:
+    return note['time']
+
+
+def as_note(entry):
+    if isinstance(entry, str):
+        return {'msg': entry, 'time': 0}
+    if isinstance(entry, dict) and isinstance(entry.get('msg'), str):
+        return {'msg': entry['msg'], 'time': entry.get('time', 0)}
+    return None
@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
-import cgitb
 import json
 import os
 import sys
 from pathlib import Path
+from urllib.parse import parse_qs
 
-cgitb.enable()
+from appid import canonical
+from notes_store import NotesStore
 
 PASSWORD = os.environ.get('SOLAR_NOTES_PASSWORD', 'Supersecrectcode1!')
 REPO_ROOT = Path(__file__).resolve().parent.parent
-NOTES_PATH = REPO_ROOT / 'notes' / 'notes.json'
+STORE = NotesStore(REPO_ROOT / 'notes')
+MAX_BULK = 500
+MAX_LIMIT = 500
 
 
 def respond(status_code: int, body: dict) -> None:
@@ -36,58 +39,119 @@ def load_payload() -> dict:
         return {}
     data = sys.stdin.buffer.read(length)
     try:
-        return json.loads(data.decode('utf-8'))
+        payload = json.loads(data.decode('utf-8'))
     except Exception:
         return {}
+    return payload if isinstance(payload, dict) else {}
 
 
-def main() -> None:
-    method = os.environ.get('REQUEST_METHOD', 'GET').upper()
-    if method != 'POST':
-        respond(405, {'ok': False, 'error': 'POST required'})
-        return
+def as_int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def as_notes(notes: list, since=0, before=None, limit=None) -> dict:
+    """Window of time-sorted notes: after since, before the cursor, newest `limit` (at most MAX_LIMIT) of them.
+
+    ``next`` is the cursor (a ``before`` value) for the page of older notes, or None.
+    """
+    since, before, limit = as_int(since, 0), as_int(before), as_int(limit)
+    limit = min(limit, MAX_LIMIT) if limit and limit > 0 else MAX_LIMIT     # never unbounded
+    start = lo = bisect_time(notes, since + 1) if since else 0
+    hi = bisect_time(notes, before) if before is not None else len(notes)
+    if hi - lo > limit:
+        lo = hi - limit
+        while lo > start and notes[lo - 1]['time'] == notes[lo]['time']:
+            lo -= 1                         # never split a tie: the cursor is a time
+    window = notes[lo:hi]
+    more = lo > start                       # older notes inside the since window were cut off
+    return {'community': window, 'developer': [], 'next': window[0]['time'] if more and window else None}
+
+
+def bisect_time(notes: list, t: int) -> int:
+    """Index of the first note with time >= t (notes are sorted by time)."""
+    lo, hi = 0, len(notes)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if notes[mid]['time'] < t:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def notes_bulk(store, apps, since=None, limit=None) -> tuple:
+    if not isinstance(apps, list) or not apps:
+        return 400, {'ok': False, 'error': 'apps list required'}
+    if len(apps) > MAX_BULK:
+        return 400, {'ok': False, 'error': f'at most {MAX_BULK} apps per request'}
+    since = since if isinstance(since, dict) else {}
+    # answer under the names asked for, read under the canonical ids
+    ids = {str(a): canonical(str(a)) for a in apps if str(a).strip()}
+    try:
+        data = store.read_many(list(dict.fromkeys(ids.values())))
+    except Exception:
+        return 500, {'ok': False, 'error': 'Failed to read notes store'}
+    return 200, {'ok': True, 'notes': {a: as_notes(data[i], since.get(a), limit=limit) for a, i in ids.items()}}
+
 
-    payload = load_payload()
+def notes(store, app: str, since=0, before=None, limit=None) -> tuple:
+    app = canonical(app)
+    if not app:
+        return 400, {'ok': False, 'error': 'app required'}
+    try:
+        data = store.read_many([app])
+    except Exception:
+        return 500, {'ok': False, 'error': 'Failed to read notes store'}
+    return 200, dict(as_notes(data[app], since, before, limit), ok=True)
+
+
+def submit(store, payload: dict) -> tuple:
     password = (payload.get('password') or '').strip()
-    package = (payload.get('pkg') or '').strip()
+    package = canonical(payload.get('pkg') or '')
     note = (payload.get('note') or '').strip()
 
     if password != PASSWORD:
-        respond(401, {'ok': False, 'error': 'Invalid password'})
-        return
+        return 401, {'ok': False, 'error': 'Invalid password'}
     if not package or not note:
-        respond(400, {'ok': False, 'error': 'Package and note are required'})
-        return
+        return 400, {'ok': False, 'error': 'Package and note are required'}
 
     try:
-        if NOTES_PATH.exists():
-            with NOTES_PATH.open('r', encoding='utf-8') as fh:
-                data = json.load(fh)
-        else:
-            data = {}
+        store.append(package, note)
     except Exception:
-        respond(500, {'ok': False, 'error': 'Failed to read notes store'})
-        return
-
-    if not isinstance(data, dict):
-        data = {}
+        return 500, {'ok': False, 'error': 'Failed to write note'}
+    return 200, {'ok': True}
+
+
+def handle(store, method: str, query: dict, payload: dict) -> tuple:
+    """(status, body) for one request; shared with notes_server.py."""
+    def arg(name: str):
+        return query.get(name, [None])[0] or ''
+
+    cmd = arg('cmd')
+    if cmd == 'notes_bulk':
+        if method == 'POST':
+            return notes_bulk(store, payload.get('apps'), payload.get('since'), payload.get('limit'))
+        return notes_bulk(store, [a for a in arg('apps').split(',') if a], limit=arg('limit'))
+    if cmd == 'notes':
+        return notes(store, arg('app'), arg('since'), arg('before'), arg('limit'))
+    if method != 'POST':
+        return 405, {'ok': False, 'error': 'POST required'}
+    return submit(store, payload)
 
-    bucket = data.get(package)
-    if not isinstance(bucket, list):
-        bucket = []
-        data[package] = bucket
-    bucket.append(note)
 
+def main() -> None:
     try:
-        NOTES_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with NOTES_PATH.open('w', encoding='utf-8') as fh:
-            json.dump(data, fh, indent=2, ensure_ascii=False)
-            fh.write('\n')
-    except Exception:
-        respond(500, {'ok': False, 'error': 'Failed to write note'})
-        return
-
-    respond(200, {'ok': True})
+        import cgitb                # removed in Python 3.13; only the CGI entry point wants it
+        cgitb.enable()
+    except ImportError:
+        pass
+    method = os.environ.get('REQUEST_METHOD', 'GET').upper()
+    query = parse_qs(os.environ.get('QUERY_STRING', ''))
+    payload = load_payload() if method == 'POST' else {}
+    respond(*handle(STORE, method, query, payload))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""One-shot migration to canonical app ids.
+
+Merges the per-app shards in data/notes/ whose names only differ by case,
+surrounding whitespace or alias ("obs.json", "Obs .json", "OBS.json" ->
+"com.obsproject.Studio.json"), keeping every note once and ordering them by
+time. Also re-keys the submit_note.py store in notes/ the same way.
+
+    python3 tools/migrate_notes.py [--dry-run]
+"""
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'cgi-bin'))
+
+from appid import canonical  # noqa: E402
+from notes_store import NotesStore  # noqa: E402
+
+SHARDS_DIR = REPO_ROOT / 'data' / 'notes'
+KINDS = ('community', 'developer')
+
+
+def shard_name(app_id: str) -> str:
+    return app_id.replace('/', '_') + '.json'
+
+
+def merge(shards: list) -> dict:
+    out = {}
+    for kind in KINDS:
+        seen, notes = set(), []
+        for data in shards:
+            for n in data.get(kind) or []:
+                key = (n.get('time'), n.get('msg'))
+                if key not in seen:
+                    seen.add(key)
+                    notes.append(n)
+        notes.sort(key=lambda n: n.get('time') or 0)
+        out[kind] = notes
+    return out
+
+
+def migrate_shards(dry_run: bool) -> None:
+    groups = {}
+    for path in sorted(SHARDS_DIR.glob('*.json')):
+        groups.setdefault(canonical(path.stem), []).append(path)
+    for app_id, paths in sorted(groups.items()):
+        target = SHARDS_DIR / shard_name(app_id)
+        if paths == [target]:
+            continue
+        print(f"{app_id}: {', '.join(repr(p.name) for p in paths)} -> {target.name!r}")
+        if dry_run:
+            continue
+        shards = []
+        for p in paths:
+            with p.open('r', encoding='utf-8') as fh:
+                shards.append(json.load(fh))
+        tmp = target.with_name(f'.{target.name}.tmp')
+        with tmp.open('w', encoding='utf-8') as fh:
+            json.dump(merge(shards), fh, indent=2, ensure_ascii=False)
+            fh.write('\n')
+        tmp.replace(target)
+        for p in paths:
+            if p != target:
+                p.unlink()
+
+
+def main(argv: list) -> int:
+    dry_run = '--dry-run' in argv
+    migrate_shards(dry_run)
+    store = NotesStore(REPO_ROOT / 'notes')
+    for old, new in store.rekey(canonical, dry_run=dry_run).items():
+        print(f'notes store: {old!r} -> {new!r}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv[1:]))